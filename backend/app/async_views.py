@@ -0,0 +1,160 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from app.authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from app.cache import get_cached_profile, cache_profile
+from app.health import upstream_health
+from app.models import Book, User
+from app.renderers import FastJSONRenderer
+from app.routers import replica_reads, replicas_allowed
+from app.serializers import BookSerializer, BookDetailSerializer, UserSerializer
+from app.throttling import SlidingWindowThrottle
+from app.versioning import VersionConflict, update_book
+from app.views import BookListCreateApiView
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """
+    Renders the data exactly like the DRF views do
+    """
+    return HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def exception_response(exc):
+    # validation errors are returned as they are, like the DRF exception handler does
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = json_response(data, exc.status_code)
+    if getattr(exc, 'wait', None):
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+class AsyncApiView(View):
+    """
+    Base of the async API views.
+    Authentication reuses the DRF classes, queries run on the async ORM,
+    so a slow request does not hold a worker thread
+    """
+
+    authentication_classes = (SessionAuthentication, SignedTokenAuthentication, CachedBasicAuthentication)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # CSRF is checked by SessionAuthentication like in DRF views
+        view.csrf_exempt = True
+        return view
+
+    def _authenticate(self, request):
+        api_request = Request(
+            request,
+            parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+            authenticators=[authentication() for authentication in self.authentication_classes],
+        )
+        # runs the authenticators while still in the sync thread
+        api_request.user
+        self.use_replicas = request.method == 'GET' and replicas_allowed(api_request.user)
+        return api_request
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            self.api_request = await sync_to_async(self._authenticate)(request)
+        except exceptions.APIException as exc:
+            return exception_response(exc)
+        if not self.api_request.user.is_authenticated:
+            return json_response(
+                {'detail': exceptions.NotAuthenticated.default_detail},
+                status.HTTP_403_FORBIDDEN,
+            )
+        try:
+            with replica_reads(self.use_replicas):
+                return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return exception_response(exc)
+
+
+class AsyncBookListCreateView(AsyncApiView):
+    """
+    Async version of BookListCreateApiView with the same filters, orderings, cursors, limits
+    and response format
+    """
+
+    throttle_scope = 'book_create'
+
+    def _list(self):
+        # the sync view filters, orders and pages, so the cursors of both views are interchangeable.
+        # The async ORM of Django runs the query in a worker thread too
+        view = BookListCreateApiView(request=self.api_request, args=self.args, kwargs=self.kwargs, format_kwarg=None)
+        return view.list(self.api_request).data
+
+    async def get(self, request, *args, **kwargs):
+        return json_response(await sync_to_async(self._list)())
+
+    async def post(self, request, *args, **kwargs):
+        throttle = SlidingWindowThrottle()
+        if not await sync_to_async(throttle.allow_request)(self.api_request, self):
+            raise exceptions.Throttled(throttle.wait())
+        if not await upstream_health().ais_available():
+            return json_response({'message': 'Can not create book. Invalid url'}, status.HTTP_400_BAD_REQUEST)
+        serializer = BookSerializer(data=self.api_request.data)
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        book = await Book.objects.acreate(**serializer.validated_data)
+        return json_response({**BookSerializer(book).data, 'job': str(book.job.id)}, status.HTTP_201_CREATED)
+
+
+class AsyncBookRetrieveUpdateView(AsyncApiView):
+    """
+    Async version of BookRetrieveUpdateApiView. Books are updated by their authors only
+    """
+
+    async def get_book(self, pk):
+        try:
+            return await Book.objects.select_related('author').aget(pk=pk)
+        except Book.DoesNotExist:
+            raise exceptions.NotFound
+
+    async def get(self, request, pk, *args, **kwargs):
+        book = await self.get_book(pk)
+        return json_response(BookDetailSerializer(book).data)
+
+    async def put(self, request, pk, *args, **kwargs):
+        serializer = BookDetailSerializer(data=self.api_request.data, partial=True)
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        changes = dict(serializer.validated_data)
+        version = changes.pop('version', None)
+        try:
+            book = await sync_to_async(update_book)(pk, self.api_request.user.id, changes, version)
+        except Book.DoesNotExist:
+            raise exceptions.NotFound
+        except PermissionDenied:
+            return json_response({'message': 'Not allowed'}, status.HTTP_403_FORBIDDEN)
+        except VersionConflict as exc:
+            return json_response(
+                {'message': 'Book was changed by another request', 'version': exc.version},
+                status.HTTP_409_CONFLICT,
+            )
+        return json_response(BookDetailSerializer(book).data)
+
+
+class AsyncOwnUser(AsyncApiView):
+    """
+    Async version of OwnUser sharing its cache
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user_id = self.api_request.user.id
+        data = await sync_to_async(get_cached_profile)(user_id)
+        if data is None:
+            user = await User.objects.aget(id=user_id)
+            # books, groups and permissions of the user are loaded while serializing
+            data = await sync_to_async(lambda: UserSerializer(user).data)()
+            await sync_to_async(cache_profile)(user_id, data)
+        return json_response({'user': data})
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, BasicAuthentication, get_authorization_header
+
+from app.models import User
+
+
+def password_digest(user, salt):
+    """
+    Digest of the password hash of the user, changes with the password
+    """
+    return salted_hmac(salt, user.password, algorithm='sha256').hexdigest()
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Basic authentication remembering verified credentials for BASIC_AUTH_CACHE_TIMEOUT seconds,
+    so repeated requests load the user by primary key instead of running the password hasher.
+    Neither the password nor its hash is stored in the cache, and a password change
+    invalidates the cached entry
+    """
+
+    key_salt = 'app.authentication.CachedBasicAuthentication'
+
+    def _cache_key(self, userid, password):
+        return f'basic-auth:{salted_hmac(self.key_salt, f"{userid}:{password}", algorithm="sha256").hexdigest()}'
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = self._cache_key(userid, password)
+        cached = cache.get(key)
+        if cached is not None:
+            user_id, digest = cached
+            user = User._default_manager.filter(pk=user_id).first()
+            if (
+                    user is not None
+                    and user.is_active
+                    and constant_time_compare(password_digest(user, self.key_salt), digest)
+            ):
+                return (user, None)
+            cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(key, (user.pk, password_digest(user, self.key_salt)), timeout=settings.BASIC_AUTH_CACHE_TIMEOUT)
+        return (user, auth)
+
+
+ACCESS_TOKEN_SALT = 'app.authentication.access'
+REFRESH_TOKEN_SALT = 'app.authentication.refresh'
+
+
+def issue_tokens(user):
+    """
+    Returns a short-lived access token and a refresh token of the user.
+    The refresh token stops working when the password is changed
+    """
+    return {
+        'access': signing.dumps({'user_id': user.pk}, salt=ACCESS_TOKEN_SALT),
+        'refresh': signing.dumps(
+            {'user_id': user.pk, 'password': password_digest(user, REFRESH_TOKEN_SALT)},
+            salt=REFRESH_TOKEN_SALT,
+        ),
+    }
+
+
+def user_from_refresh_token(token):
+    """
+    Returns the active user of a valid refresh token or None
+    """
+    try:
+        payload = signing.loads(token, salt=REFRESH_TOKEN_SALT, max_age=settings.REFRESH_TOKEN_LIFETIME)
+    except signing.BadSignature:
+        return None
+    user = User._default_manager.filter(pk=payload['user_id'], is_active=True).first()
+    if user is None or not constant_time_compare(password_digest(user, REFRESH_TOKEN_SALT), payload['password']):
+        return None
+    return user
+
+
+class TokenUser:
+    """
+    Authenticated user known only by the id from the token.
+    The user row is loaded on the first access to any other attribute
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.id = self.pk = user_id
+        self._user = None
+
+    def _load(self):
+        if self._user is None:
+            self._user = User._default_manager.filter(pk=self.id).first()
+            if self._user is None:
+                raise exceptions.AuthenticationFailed('User not found.')
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __eq__(self, other):
+        return isinstance(other, (TokenUser, User)) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self._load())
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Stateless authentication with `Authorization: Bearer <access token>`.
+    The token is checked by its signature and age only, so no database query is made
+    until the view needs more of the user than its id. A deactivated user keeps access
+    until the token expires in ACCESS_TOKEN_LIFETIME seconds
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            payload = signing.loads(auth[1].decode(), salt=ACCESS_TOKEN_SALT, max_age=settings.ACCESS_TOKEN_LIFETIME)
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        return (TokenUser(payload['user_id']), auth[1].decode())
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+PROFILE_KEY = 'profile:{user_id}'
+PROFILE_VERSION_KEY = 'profile-version:{user_id}'
+PROFILE_HITS_KEY = 'profile:hits'
+PROFILE_MISSES_KEY = 'profile:misses'
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_cached_profile(user_id):
+    data = cache.get(PROFILE_KEY.format(user_id=user_id))
+    _increment(PROFILE_MISSES_KEY if data is None else PROFILE_HITS_KEY)
+    return data
+
+
+def cache_profile(user_id, data):
+    cache.set(PROFILE_KEY.format(user_id=user_id), data, timeout=settings.PROFILE_CACHE_TIMEOUT)
+
+
+def get_cached_profile_version(user_id):
+    return cache.get(PROFILE_VERSION_KEY.format(user_id=user_id))
+
+
+def cache_profile_version(user_id, version):
+    cache.set(PROFILE_VERSION_KEY.format(user_id=user_id), version, timeout=settings.PROFILE_CACHE_TIMEOUT)
+
+
+def invalidate_profiles(*user_ids):
+    cache.delete_many([
+        key.format(user_id=user_id)
+        for user_id in set(user_ids) if user_id is not None
+        for key in (PROFILE_KEY, PROFILE_VERSION_KEY)
+    ])
+
+
+def invalidate_profiles_on_commit(*user_ids):
+    """
+    Invalidates the profiles once the current transaction is committed,
+    so a concurrent reader can not cache the old profile again before the commit
+    """
+    transaction.on_commit(lambda: invalidate_profiles(*user_ids))
+
+
+def profile_cache_stats():
+    stats = cache.get_many([PROFILE_HITS_KEY, PROFILE_MISSES_KEY])
+    return {
+        'hits': stats.get(PROFILE_HITS_KEY, 0),
+        'misses': stats.get(PROFILE_MISSES_KEY, 0),
+    }
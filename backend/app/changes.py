@@ -0,0 +1,117 @@
+from collections import namedtuple
+
+from django.core import signing
+from django.db import connections
+from django.db.models import BigIntegerField, Exists, Func, OuterRef, Q
+
+from app.models import Book, BookChange
+
+SYNC_TOKEN_SALT = 'app.changes.sync'
+
+# position of a change in the feed, ordered by the transaction that made it and then by id
+START = (0, 0)
+
+ChangesPage = namedtuple('ChangesPage', ('books', 'deleted_ids', 'cursor', 'has_more'))
+
+
+def transaction_id_sql(connection):
+    """
+    Id of the current transaction on Postgres. SQLite runs one writing transaction at a time,
+    so the ids of its changes already follow the commit order and every change gets 0
+    """
+    if connection.vendor == 'postgresql':
+        return 'pg_current_xact_id()::text::bigint'
+    return '0'
+
+
+class CurrentTransactionId(Func):
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return transaction_id_sql(connection), []
+
+
+class OldestRunningTransactionId(Func):
+    """
+    Transactions with lower ids have all finished when the query starts
+    """
+
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint', []
+
+
+def record_changes(book_ids, deleted=False):
+    """
+    Appends the books to the change feed with one INSERT, in the transaction of the write
+    """
+    BookChange.objects.bulk_create([
+        BookChange(book_id=book_id, deleted=deleted, txid=CurrentTransactionId()) for book_id in book_ids
+    ])
+
+
+def encode_sync_token(cursor):
+    return signing.dumps(list(cursor), salt=SYNC_TOKEN_SALT)
+
+
+def decode_sync_token(token):
+    """
+    Returns the cursor of a sync token or None when the token is not valid
+    """
+    try:
+        cursor = signing.loads(token, salt=SYNC_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if not (isinstance(cursor, list) and len(cursor) == 2 and all(isinstance(value, int) for value in cursor)):
+        return None
+    return tuple(cursor)
+
+
+def _after(cursor):
+    txid, change_id = cursor
+    return Q(txid__gt=txid) | Q(txid=txid, id__gt=change_id)
+
+
+def changes_since(cursor, limit):
+    """
+    Books changed and deleted after the change at `cursor`, reading at most `limit` changes
+    with the (txid, id) index of the feed and the books with one more query.
+    A book changed several times is returned once, in the position of its last change.
+
+    Ids are taken before commit, so a change with a lower id can become visible after one with
+    a higher id. On Postgres changes are therefore served in the order of their transactions,
+    and only those of transactions older than any transaction still running: a transaction
+    committing later always sorts after the returned cursor
+    """
+    changes = BookChange.objects.filter(_after(cursor))
+    if connections[changes.db].vendor == 'postgresql':
+        changes = changes.filter(txid__lt=OldestRunningTransactionId())
+    changes = list(changes.order_by('txid', 'id').values_list('txid', 'id', 'book_id', 'deleted')[:limit + 1])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    latest = {}
+    for _, _, book_id, deleted in changes:
+        latest.pop(book_id, None)
+        latest[book_id] = deleted
+    books = Book.objects.in_bulk([book_id for book_id, deleted in latest.items() if not deleted])
+    return ChangesPage(
+        books=[books[book_id] for book_id in latest if book_id in books],
+        # a book deleted after its change was read has its tombstone further in the feed
+        deleted_ids=[book_id for book_id in latest if book_id not in books],
+        cursor=tuple(changes[-1][:2]) if changes else cursor,
+        has_more=has_more,
+    )
+
+
+def compact_changes():
+    """
+    Deletes changes followed by a newer change of the same book, clients only need the last one
+    """
+    newer = BookChange.objects.filter(
+        Q(txid__gt=OuterRef('txid')) | Q(txid=OuterRef('txid'), id__gt=OuterRef('id')),
+        book_id=OuterRef('book_id'),
+    )
+    deleted, _ = BookChange.objects.filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,72 @@
+import hashlib
+
+from django.db.models import Max
+
+from app.cache import get_cached_profile_version, cache_profile_version
+from app.models import Book, User
+
+
+def _etag(*values):
+    return hashlib.md5(repr(values).encode(), usedforsecurity=False).hexdigest()
+
+
+def _memoized(request, key, load):
+    # `condition` asks for the ETag and Last-Modified separately, both come from one query
+    versions = request.__dict__.setdefault('_conditional_versions', {})
+    if key not in versions:
+        versions[key] = load()
+    return versions[key]
+
+
+def book_version(request, pk, *args, **kwargs):
+    """
+    Modification time of the book, read from the primary key index
+    """
+    return _memoized(
+        request,
+        ('book', pk),
+        lambda: Book.objects.filter(pk=pk).values_list('updated_at', flat=True).first(),
+    )
+
+
+def book_etag(request, pk, *args, **kwargs):
+    updated_at = book_version(request, pk)
+    return None if updated_at is None else _etag(pk, updated_at)
+
+
+def book_last_modified(request, pk, *args, **kwargs):
+    return book_version(request, pk)
+
+
+def _load_profile_version(user_id):
+    version = get_cached_profile_version(user_id)
+    if version is None:
+        version = User.objects.filter(pk=user_id).annotate(
+            books_updated_at=Max('books__updated_at'),
+        ).values_list('updated_at', 'last_login', 'books_count', 'books_updated_at').first()
+        if version is not None:
+            cache_profile_version(user_id, version)
+    return version
+
+
+def profile_version(request, *args, **kwargs):
+    """
+    Everything the own user profile depends on: the user row with the count of the user books
+    and the latest modification of the books, in one aggregate query.
+    It is cached next to the profile and invalidated together with it
+    """
+    user_id = request.user.id
+    return _memoized(request, ('profile', user_id), lambda: _load_profile_version(user_id))
+
+
+def profile_etag(request, *args, **kwargs):
+    version = profile_version(request)
+    return None if version is None else _etag(request.user.id, *version)
+
+
+def profile_last_modified(request, *args, **kwargs):
+    version = profile_version(request)
+    if version is None:
+        return None
+    updated_at, last_login, books_count, books_updated_at = version
+    return max(value for value in (updated_at, last_login, books_updated_at) if value is not None)
@@ -0,0 +1,78 @@
+from collections import Counter
+
+from django.db.models import Case, Count, DateTimeField, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from app.models import Book, User
+
+
+def _last_book_at():
+    # reads every book of the author, only used when books are removed or recounted
+    return Subquery(
+        Book.objects.filter(author=OuterRef('pk')).order_by('-created_at').values('created_at')[:1],
+    )
+
+
+def _count_books():
+    return Coalesce(
+        Subquery(Book.objects.filter(author=OuterRef('pk')).order_by().values('author').annotate(
+            count=Count('id'),
+        ).values('count')),
+        0,
+    )
+
+
+def books_added(books):
+    """
+    Adds new books to the counters of their authors with one UPDATE. The latest book date only
+    moves forward to the newest of the added books, so no other book of the author is read
+    """
+    if not books:
+        return
+    added = Counter(book.author_id for book in books)
+    newest = {}
+    for book in books:
+        newest[book.author_id] = max(newest.get(book.author_id, book.created_at), book.created_at)
+    added_count = Case(
+        *(When(pk=author_id, then=Value(count)) for author_id, count in added.items()),
+        default=Value(0),
+    )
+    newest_created = Case(
+        *(When(pk=author_id, then=Value(created_at)) for author_id, created_at in newest.items()),
+        output_field=DateTimeField(),
+    )
+    User.objects.filter(pk__in=added).update(
+        books_count=F('books_count') + added_count,
+        last_book_at=Greatest(Coalesce(F('last_book_at'), newest_created), newest_created),
+    )
+
+
+def books_removed(*author_ids):
+    """
+    Takes a removed book off the counters of each author
+    """
+    for author_id in author_ids:
+        User.objects.filter(pk=author_id).update(
+            books_count=Greatest(F('books_count') - 1, 0),
+            last_book_at=_last_book_at(),
+        )
+
+
+def stale_counters():
+    """
+    Users whose counters differ from their books
+    """
+    return User.objects.annotate(
+        real_books_count=Count('books'),
+        real_last_book_at=Max('books__created_at'),
+    ).exclude(
+        Q(books_count=F('real_books_count'))
+        & (Q(last_book_at=F('real_last_book_at')) | Q(last_book_at__isnull=True, real_last_book_at__isnull=True)),
+    )
+
+
+def reconcile_counters(user_ids):
+    """
+    Recounts books of the users from scratch
+    """
+    return User.objects.filter(pk__in=user_ids).update(books_count=_count_books(), last_book_at=_last_book_at())
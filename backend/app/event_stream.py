@@ -0,0 +1,109 @@
+import asyncio
+import io
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.utils.functional import SimpleLazyObject
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from app.async_views import AsyncApiView
+from app.events import event_broker
+from app.renderers import FastJSONRenderer
+
+BOOK_EVENTS_PATH = '/api/v1/events/books/'
+
+
+def authenticate(scope):
+    """
+    Runs the authentication classes of the API views against the request of the stream,
+    with the session and the user set up like the middleware does.
+    The stream sends no request_started/request_finished signals, so the database connections
+    of the thread are recycled here like Django does around a request
+    """
+    close_old_connections()
+    try:
+        request = ASGIRequest(scope, io.BytesIO())
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore(
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME),
+        )
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        api_request = Request(
+            request,
+            authenticators=[authentication() for authentication in AsyncApiView.authentication_classes],
+        )
+        return api_request.user.is_authenticated
+    finally:
+        close_old_connections()
+
+
+async def send_json(send, data, status_code):
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': FastJSONRenderer().render(data)})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def book_events(scope, receive, send):
+    """
+    Server-Sent Events of created, updated and deleted books.
+    Every client is a coroutine waiting on its own queue of the broker, so idle connections
+    take no thread and no database connection. Clients that fall behind are disconnected
+    and catch up with the change feed when they reconnect
+    """
+    if scope['method'] != 'GET':
+        return await send_json(send, {'detail': 'Method not allowed.'}, 405)
+    try:
+        authenticated = await sync_to_async(authenticate)(scope)
+    except exceptions.APIException as exc:
+        return await send_json(send, {'detail': exc.detail}, exc.status_code)
+    if not authenticated:
+        return await send_json(send, {'detail': exceptions.NotAuthenticated.default_detail}, 403)
+
+    async with event_broker().subscribe() as subscription:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # proxies must not buffer the stream
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            while True:
+                message = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    (message, disconnected),
+                    timeout=settings.BOOK_EVENTS_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    message.cancel()
+                    return
+                if message not in done:
+                    message.cancel()
+                    # comments keep idle connections open through proxies
+                    body = b': keep-alive\n\n'
+                elif message.result() is None:
+                    break
+                else:
+                    body = f'data: {message.result()}\n\n'.encode()
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected.cancel()
+        await send({'type': 'http.response.body', 'body': b''})
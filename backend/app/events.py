@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Events waiting to be sent to one client. A client that does not keep up gets None
+    after `size` events and is disconnected instead of buffering without a limit
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.size = size
+        # one extra slot for the None telling the client to go away
+        self.queue = asyncio.Queue(maxsize=size + 1)
+        self.overflowed = False
+
+    def deliver(self, message):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.size:
+            self.overflowed = True
+            message = None
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class MemoryBroker:
+    """
+    Events passed to the clients connected to this process only.
+    Used without Redis and by the tests
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        for event in events:
+            self.dispatch(json.dumps(event))
+
+    def dispatch(self, message):
+        """
+        Hands the message to every subscription in the event loop of its client,
+        may be called from any thread
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # the event loop of the client is closed
+                self._discard(subscription)
+
+    def _discard(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    async def start(self):
+        pass
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self):
+        await self.start()
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._discard(subscription)
+
+    @property
+    def subscribers(self):
+        return len(self._subscriptions)
+
+
+class RedisBroker(MemoryBroker):
+    """
+    Events published to a Redis pub/sub channel shared by all processes.
+    Every process listens to the channel with a single connection
+    and fans the events out to its own clients
+    """
+
+    def __init__(self, url, channel, queue_size=100):
+        super().__init__(queue_size)
+        self.url = url
+        self.channel = channel
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._listener = None
+
+    def publish(self, events):
+        try:
+            with self.client.pipeline(transaction=False) as pipeline:
+                for event in events:
+                    pipeline.publish(self.channel, json.dumps(event))
+                pipeline.execute()
+        except redis.RedisError as exc:
+            logger.warning('Book events are not published: %s', exc)
+
+    async def start(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        client = aioredis.Redis.from_url(self.url)
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    self.dispatch(message['data'].decode())
+            except redis.RedisError as exc:
+                logger.warning('Lost the subscription to %s: %s', self.channel, exc)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def event_broker():
+    """
+    Returns the process wide broker of book events
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = settings.BOOK_EVENTS_REDIS_URL
+                if url:
+                    _broker = RedisBroker(url, settings.BOOK_EVENTS_CHANNEL, settings.BOOK_EVENTS_QUEUE_SIZE)
+                else:
+                    _broker = MemoryBroker(settings.BOOK_EVENTS_QUEUE_SIZE)
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_event_broker(setting, **kwargs):
+    global _broker
+    if setting in ('BOOK_EVENTS_REDIS_URL', 'BOOK_EVENTS_CHANNEL', 'BOOK_EVENTS_QUEUE_SIZE'):
+        _broker = None
+
+
+def book_event(kind, book):
+    """
+    Compact event of a book, clients fetch the whole book when they need it
+    """
+    if kind == 'deleted':
+        return {'type': kind, 'id': book.pk, 'author': book.author_id}
+    return {'type': kind, 'id': book.pk, 'title': book.title, 'author': book.author_id, 'version': book.version}
+
+
+def publish_book_events(kind, books):
+    """
+    Publishes events of the books once the current transaction is committed
+    """
+    events = [book_event(kind, book) for book in books]
+    if events:
+        transaction.on_commit(lambda: event_broker().publish(events))
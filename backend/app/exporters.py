@@ -0,0 +1,55 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+BOOK_EXPORT_FIELDS = (
+    'id',
+    'title',
+    'short_description',
+    'author_id',
+)
+
+USER_EXPORT_FIELDS = (
+    'id',
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'age',
+    'date_joined',
+)
+
+
+class Echo:
+    """
+    File-like object returning what is written, so `csv.writer` can produce single lines
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, fields, chunk_size):
+    """
+    Iterates over rows with a server-side cursor, fetching `chunk_size` rows at a time
+    """
+    return queryset.order_by('pk').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(queryset, fields, chunk_size):
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def csv_lines(queryset, fields, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in iter_rows(queryset, fields, chunk_size):
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
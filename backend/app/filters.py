@@ -0,0 +1,68 @@
+import sys
+
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+SURROGATES = range(0xD800, 0xE000)
+
+
+def next_prefix(prefix):
+    """
+    The smallest string greater than every string starting with `prefix`,
+    None when the prefix is made of the last code point only and there is no such string.
+    Surrogates are skipped, databases do not store them
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if code in SURROGATES:
+        code = SURROGATES.stop
+    return prefix[:-1] + chr(code)
+
+
+class BookFilterBackend(BaseFilterBackend):
+    """
+    Filters books by `author`, `title_prefix` and `mine`.
+    The title prefix is a range on the title index and the exact `startswith` check
+    on top of it, a plain LIKE would not use the index on every database
+    """
+
+    author_field = serializers.IntegerField(min_value=1)
+    mine_field = serializers.BooleanField()
+
+    def _param(self, request, name, field):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            return field.run_validation(value)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({name: exc.detail})
+
+    def filter_queryset(self, request, queryset, view):
+        author = self._param(request, 'author', self.author_field)
+        if author is not None:
+            queryset = queryset.filter(author_id=author)
+        if self._param(request, 'mine', self.mine_field):
+            queryset = queryset.filter(author_id=request.user.id)
+        prefix = request.query_params.get('title_prefix')
+        if prefix:
+            queryset = queryset.filter(title__gte=prefix, title__startswith=prefix)
+            upper = next_prefix(prefix)
+            if upper is not None:
+                queryset = queryset.filter(title__lt=upper)
+        return queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Ordering by the whitelisted `ordering_fields` of the view with the primary key
+    as the last key, so the cursor pagination sees a total order
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ())
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+        return tuple(ordering)
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import threading
+import time
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to the upstream after `failure_threshold` failures in a row
+    and lets a single probe through once `reset_timeout` seconds have passed
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        return self.state != self.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+
+class UpstreamHealth:
+    """
+    Availability of the upstream service.
+    The status is cached for `ttl` seconds and refreshed in a background thread,
+    so `is_available()` never waits for the network
+    """
+
+    def __init__(
+            self,
+            url,
+            timeout=2.0,
+            ttl=30.0,
+            failure_threshold=3,
+            reset_timeout=60.0,
+            pool_size=4,
+            fail_open=True,
+            session=None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.fail_open = fail_open
+        self.pool_size = pool_size
+        self.session = session or self._build_session(pool_size)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._available = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._refresh_task = None
+        self._async_client = None
+        self._async_client_loop = None
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def is_stale(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.ttl
+
+    def _status(self):
+        if self._available is None:
+            return self.fail_open
+        return self._available
+
+    def _store(self, available):
+        with self._lock:
+            self._available = available
+            self._checked_at = time.monotonic()
+        return available
+
+    def _record(self, available):
+        if available:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return available
+
+    def is_available(self):
+        if self.is_stale:
+            self.refresh_in_background()
+        return self._status()
+
+    async def ais_available(self):
+        if self.is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.get_running_loop().create_task(self.arefresh())
+        return self._status()
+
+    def check(self):
+        """
+        Makes a single request to the upstream unless the circuit is open
+        """
+        if not self.breaker.allow_request():
+            return False
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+        except requests.RequestException as exc:
+            logger.warning('Upstream %s is not reachable: %s', self.url, exc)
+            return self._record(False)
+        return self._record(response.status_code == 200)
+
+    async def _get_async_client(self):
+        # httpx clients are bound to the event loop they were first used in
+        loop = asyncio.get_running_loop()
+        if self._async_client_loop is not loop:
+            await self._close_async_client()
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size),
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def _close_async_client(self):
+        client, self._async_client, self._async_client_loop = self._async_client, None, None
+        if client is not None:
+            await client.aclose()
+
+    async def acheck(self):
+        """
+        Async version of `check()`, the request does not block the event loop
+        """
+        if not self.breaker.allow_request():
+            return False
+        client = await self._get_async_client()
+        try:
+            response = await client.get(self.url)
+        except httpx.HTTPError as exc:
+            logger.warning('Upstream %s is not reachable: %s', self.url, exc)
+            return self._record(False)
+        return self._record(response.status_code == 200)
+
+    def refresh(self):
+        return self._store(self.check())
+
+    async def arefresh(self):
+        return self._store(await self.acheck())
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, name='upstream-health', daemon=True)
+            self._refresh_thread.start()
+
+    def close(self):
+        self.session.close()
+
+
+class AlwaysAvailable:
+    """
+    Health backend that never calls the upstream
+    """
+
+    def __init__(self, **options):
+        pass
+
+    def is_available(self):
+        return True
+
+    async def ais_available(self):
+        return True
+
+    def refresh(self):
+        return True
+
+    async def arefresh(self):
+        return True
+
+    def close(self):
+        pass
+
+
+_upstream_health = None
+_upstream_health_lock = threading.Lock()
+
+
+def upstream_health():
+    """
+    Returns the process wide health backend configured by `UPSTREAM_HEALTH`
+    """
+    global _upstream_health
+    if _upstream_health is None:
+        with _upstream_health_lock:
+            if _upstream_health is None:
+                backend = import_string(settings.UPSTREAM_HEALTH['BACKEND'])
+                _upstream_health = backend(**settings.UPSTREAM_HEALTH.get('OPTIONS', {}))
+    return _upstream_health
+
+
+@receiver(setting_changed)
+def reset_upstream_health(setting, **kwargs):
+    global _upstream_health
+    if setting == 'UPSTREAM_HEALTH' and _upstream_health is not None:
+        _upstream_health.close()
+        _upstream_health = None
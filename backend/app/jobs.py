@@ -0,0 +1,271 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS = {}
+
+
+def job(function):
+    """
+    Registers a function the worker can run by its name. Arguments must be JSON serializable
+    """
+    JOBS[function.__name__] = function
+    function.enqueue = lambda *args, user_id=None: enqueue(function.__name__, *args, user_id=user_id)
+    return function
+
+
+class RedisQueue:
+    """
+    Job ids in a Redis list, pushed on the left and moved from the right into the processing list
+    of the worker taking them, where they stay until the job has run. Retries wait in a sorted set
+    scored by the time they are due
+    """
+
+    promote_script = """
+    local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    for _, job_id in ipairs(due) do
+        redis.call('ZREM', KEYS[1], job_id)
+        redis.call('LPUSH', KEYS[2], job_id)
+    end
+    return #due
+    """
+
+    def __init__(self, url, name):
+        self.client = redis.Redis.from_url(url)
+        self.name = name
+        self.delayed = f'{name}:delayed'
+        self._promote = self.client.register_script(self.promote_script)
+
+    def processing(self, worker):
+        return f'{self.name}:processing:{worker}'
+
+    def heartbeat(self, worker):
+        return f'{self.name}:worker:{worker}'
+
+    def push(self, job_id):
+        self.client.lpush(self.name, str(job_id))
+
+    def push_later(self, job_id, delay):
+        self.client.zadd(self.delayed, {str(job_id): time.time() + delay})
+
+    def promote(self):
+        """
+        Queues the retries that are due
+        """
+        return self._promote(keys=[self.delayed, self.name], args=[time.time()])
+
+    def pop(self, timeout, worker):
+        item = self.client.blmove(self.name, self.processing(worker), timeout, 'RIGHT', 'LEFT')
+        return None if item is None else item.decode()
+
+    def ack(self, job_id, worker):
+        self.client.lrem(self.processing(worker), 1, str(job_id))
+
+    def beat(self, worker, ttl):
+        self.client.set(self.heartbeat(worker), 1, ex=ttl)
+
+    def stop(self, worker):
+        self.client.delete(self.heartbeat(worker))
+
+    def dead_workers(self):
+        prefix = self.processing('')
+        workers = [key.decode()[len(prefix):] for key in self.client.scan_iter(match=f'{prefix}*')]
+        return [worker for worker in workers if not self.client.exists(self.heartbeat(worker))]
+
+    def taken(self, worker):
+        return [item.decode() for item in self.client.lrange(self.processing(worker), 0, -1)]
+
+    def release(self, worker):
+        """
+        Moves the jobs taken by the worker back to the queue, one atomic move at a time,
+        so workers reaping at the same time never queue a job twice
+        """
+        while self.client.lmove(self.processing(worker), self.name, 'RIGHT', 'LEFT') is not None:
+            pass
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def job_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = RedisQueue(settings.JOBS_REDIS_URL, settings.JOBS_QUEUE)
+    return _queue
+
+
+@receiver(setting_changed)
+def reset_job_queue(setting, **kwargs):
+    global _queue
+    if setting in ('JOBS_REDIS_URL', 'JOBS_QUEUE'):
+        _queue = None
+
+
+def enqueue(name, *args, user_id=None):
+    """
+    Saves the job of the user and queues it once the current transaction is committed.
+    With JOBS_EAGER the job runs right away instead, which is what the tests use
+    """
+    if name not in JOBS:
+        raise KeyError(f'Unknown job {name}')
+    instance = Job.objects.create(name=name, args=list(args), user_id=user_id)
+    if settings.JOBS_EAGER:
+        run_job(instance)
+    else:
+        transaction.on_commit(lambda: job_queue().push(instance.id))
+    return instance
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before the next attempt, doubled after every failed one
+    """
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_job(instance):
+    """
+    Runs the job and stores its status. A failed job is queued again after a growing delay
+    until JOBS_MAX_ATTEMPTS is reached
+    """
+    instance.attempts += 1
+    instance.status = Job.RUNNING
+    instance.save(update_fields=['attempts', 'status'])
+    try:
+        JOBS[instance.name](*instance.args)
+    except Exception:
+        logger.exception('Job %s failed', instance)
+        instance.error = traceback.format_exc()
+        retry = not settings.JOBS_EAGER and instance.attempts < settings.JOBS_MAX_ATTEMPTS
+        instance.status = Job.QUEUED if retry else Job.FAILED
+    else:
+        instance.error = ''
+        instance.status = Job.DONE
+    if instance.status != Job.QUEUED:
+        instance.finished_at = timezone.now()
+    instance.save(update_fields=['status', 'error', 'finished_at'])
+    if instance.status == Job.QUEUED:
+        job_queue().push_later(instance.id, retry_delay(instance.attempts))
+    return instance
+
+
+def claim_job(job_id):
+    """
+    Marks a queued job as taken, so a job pushed twice runs once
+    """
+    claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(status=Job.RUNNING)
+    return Job.objects.get(id=job_id) if claimed else None
+
+
+def requeue_stale_jobs(queue):
+    """
+    Queues again the jobs taken by workers that stopped sending heartbeats.
+    Jobs they left running are marked as queued first, so the next worker can claim them
+    """
+    job_ids = []
+    for worker in queue.dead_workers():
+        taken = queue.taken(worker)
+        Job.objects.filter(id__in=taken, status=Job.RUNNING).update(status=Job.QUEUED)
+        queue.release(worker)
+        job_ids.extend(taken)
+    if job_ids:
+        logger.warning('Queued %s jobs of stopped workers again', len(job_ids))
+    return job_ids
+
+
+def prune_jobs(batch_size=1000):
+    """
+    Deletes jobs finished more than JOBS_RETENTION seconds ago, a batch at a time,
+    so the table does not grow with every book write
+    """
+    finished = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        finished_at__lt=timezone.now() - timedelta(seconds=settings.JOBS_RETENTION),
+    )
+    deleted = 0
+    while True:
+        job_ids = list(finished.values_list('id', flat=True)[:batch_size])
+        if not job_ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=job_ids).delete()[0]
+
+
+class Heartbeat(threading.Thread):
+    """
+    Tells the other workers this one is alive, also while it runs a long job
+    """
+
+    def __init__(self, queue, worker, ttl):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.worker = worker
+        self.ttl = ttl
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.ttl / 3):
+            try:
+                self.queue.beat(self.worker, self.ttl)
+            except redis.RedisError as exc:
+                logger.warning('Heartbeat of worker %s failed: %s', self.worker, exc)
+
+    def __enter__(self):
+        self.queue.beat(self.worker, self.ttl)
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.queue.stop(self.worker)
+
+
+def work(timeout=5, once=False, worker=None):
+    """
+    Runs queued jobs until stopped. With `once` returns after the queue is found empty.
+    A job id leaves the processing list of the worker only after the job has run,
+    so jobs of a worker that dies are queued again by the others.
+    Every JOBS_WORKER_TIMEOUT seconds the worker also deletes old finished jobs
+    """
+    queue = job_queue()
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    ttl = settings.JOBS_WORKER_TIMEOUT
+    next_reap = 0
+    with Heartbeat(queue, worker, ttl):
+        while True:
+            if time.monotonic() >= next_reap:
+                close_old_connections()
+                requeue_stale_jobs(queue)
+                prune_jobs()
+                next_reap = time.monotonic() + ttl
+            queue.promote()
+            job_id = queue.pop(timeout, worker)
+            if job_id is None:
+                if once:
+                    return
+                continue
+            close_old_connections()
+            instance = claim_job(job_id)
+            if instance is None:
+                logger.warning('Job %s is not queued, skipped', job_id)
+            else:
+                run_job(instance)
+            queue.ack(job_id, worker)
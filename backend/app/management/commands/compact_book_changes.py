@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from app.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Deletes entries of the book change feed superseded by a newer change of the same book'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {compact_changes()} superseded changes')
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.exporters import EXPORT_FORMATS, BOOK_EXPORT_FIELDS, USER_EXPORT_FIELDS
+from app.models import Book, User
+
+EXPORTS = {
+    'books': (Book, BOOK_EXPORT_FIELDS),
+    'users': (User, USER_EXPORT_FIELDS),
+}
+
+
+class Command(BaseCommand):
+    help = 'Streams all books or users as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=EXPORTS.keys())
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS.keys(), default='ndjson')
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', help='File to write to instead of stdout')
+
+    def handle(self, *args, model, export_format, chunk_size, output, **options):
+        model_class, fields = EXPORTS[model]
+        lines, _ = EXPORT_FORMATS[export_format]
+        rows = lines(model_class.objects.all(), fields, chunk_size)
+        if output is None:
+            for line in rows:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as file:
+            file.writelines(rows)
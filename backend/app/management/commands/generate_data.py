@@ -0,0 +1,301 @@
+import contextlib
+import csv
+import io
+import random
+import time
+from array import array
+from datetime import datetime, timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from app.changes import transaction_id_sql
+from app.models import Book, BookChange, User
+from app.search import update_search_vectors
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore et dolore '
+    'magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo '
+    'consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur excepteur sint '
+    'occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim id est laborum'
+).split()
+
+# long enough to cut most descriptions out of it, repeated for longer ones
+TEXT = ' '.join(WORDS * 30)
+
+USER_COLUMNS = (
+    'username', 'email', 'password', 'first_name', 'last_name', 'is_superuser', 'is_staff', 'is_active',
+    'date_joined', 'age', 'updated_at', 'books_count', 'last_book_at',
+)
+
+BOOK_COLUMNS = ('title', 'short_description', 'author_id', 'created_at', 'updated_at', 'version')
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'pareto')
+
+
+def parse_range(value):
+    low, _, high = value.partition(':')
+    try:
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise CommandError(f'Expected MIN:MAX, got {value}')
+    if not 0 <= low <= high:
+        raise CommandError(f'Expected 0 <= MIN <= MAX, got {value}')
+    return low, high
+
+
+def to_datetime(timestamp):
+    return None if timestamp is None else datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class CopyStream:
+    """
+    File-like object feeding COPY FROM STDIN with CSV lines of the rows,
+    formatted only as they are read
+    """
+
+    NULL = r'\N'
+
+    def __init__(self, rows, chunk_rows=1000):
+        self.rows = iter(rows)
+        self.chunk_rows = chunk_rows
+        self.buffer = bytearray()
+        self.text = io.StringIO()
+        self.writer = csv.writer(self.text, lineterminator='\n')
+
+    def _format(self, value):
+        if value is None:
+            return self.NULL
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _fill(self):
+        self.writer.writerows([self._format(value) for value in row] for row in islice(self.rows, self.chunk_rows))
+        data = self.text.getvalue()
+        self.text.seek(0)
+        self.text.truncate()
+        self.buffer += data.encode()
+        return bool(data)
+
+    def read(self, size=-1):
+        while (size < 0 or len(self.buffer) < size) and self._fill():
+            pass
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+class DataGenerator:
+    """
+    Rows of users and books drawn from the configured distributions.
+    The users are drawn first, remembering only the number of books of every author
+    and the dates the books are spread over, so the books can be drawn afterwards
+    without keeping millions of rows in memory
+    """
+
+    def __init__(self, rng, books_per_author, distribution, max_books, description_length, days, now):
+        self.rng = rng
+        self.books_per_author = books_per_author
+        self.distribution = distribution
+        self.max_books = max_books
+        self.description_length = description_length
+        self.days = days
+        self.now = now
+        self.books_counts = array('I')
+        self.joined = array('d')
+        self.last_books = array('d')
+
+    def books_count(self):
+        mean = self.books_per_author
+        if self.distribution == 'fixed':
+            count = mean
+        elif self.distribution == 'uniform':
+            count = self.rng.randint(0, 2 * mean)
+        else:
+            # long tail of prolific authors with the same mean, the alpha of the 80/20 rule
+            alpha = 1.16
+            count = int(mean * (alpha - 1) / alpha * self.rng.paretovariate(alpha))
+        return min(count, self.max_books)
+
+    def words(self, low, high):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def user_rows(self, prefix, count, password):
+        for index in range(count):
+            username = f'{prefix}{index}'
+            joined = self.now - self.rng.uniform(0, self.days * 86400)
+            books_count = self.books_count()
+            last_book = self.rng.uniform(joined, self.now) if books_count else None
+            self.books_counts.append(books_count)
+            self.joined.append(joined)
+            self.last_books.append(last_book or 0)
+            yield (
+                username,
+                f'{username}@example.com',
+                password,
+                self.rng.choice(WORDS).capitalize(),
+                self.rng.choice(WORDS).capitalize(),
+                False,
+                False,
+                True,
+                to_datetime(joined),
+                self.rng.randint(10, 100),
+                to_datetime(joined),
+                books_count,
+                to_datetime(last_book),
+            )
+
+    def description(self):
+        length = self.rng.randint(*self.description_length)
+        if not length:
+            return None
+        if length >= len(TEXT):
+            return ((TEXT + ' ') * (length // len(TEXT) + 1))[:length]
+        start = self.rng.randrange(len(TEXT) - length)
+        return TEXT[start:start + length]
+
+    def book_rows(self, author_ids):
+        for author_id, books_count, joined, last_book in zip(
+                author_ids, self.books_counts, self.joined, self.last_books,
+        ):
+            for number in range(books_count):
+                # the last book of the author matches `last_book_at` of the user
+                created = last_book if number == books_count - 1 else self.rng.uniform(joined, last_book)
+                yield (
+                    self.words(1, 5).capitalize()[:50],
+                    self.description(),
+                    author_id,
+                    to_datetime(created),
+                    to_datetime(created),
+                    1,
+                )
+
+
+def copy_rows(model, columns, rows):
+    """
+    Streams the rows into the table of the model with COPY FROM STDIN
+    """
+    sql = "COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{null}')".format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        columns=', '.join(connection.ops.quote_name(model._meta.get_field(column).column) for column in columns),
+        null=CopyStream.NULL,
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, CopyStream(rows))
+
+
+@contextlib.contextmanager
+def generated_timestamps(model):
+    """
+    Keeps the generated values of `auto_now` and `auto_now_add` fields, which `bulk_create`
+    would replace with the current time. COPY writes the values as they are
+    """
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    flags = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def create_rows(model, columns, rows, batch_size):
+    """
+    Saves the rows with `bulk_create` in batches, for databases without COPY
+    """
+    rows = iter(rows)
+    with generated_timestamps(model):
+        while batch := list(islice(rows, batch_size)):
+            model.objects.bulk_create([model(**dict(zip(columns, row))) for row in batch])
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates users and books for capacity tests. Rows are streamed with COPY on Postgres '
+        'and saved with bulk_create elsewhere, all users share one password hash'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--books-per-author', type=int, default=10, help='Mean number of books of an author')
+        parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='pareto', help='Books per author')
+        parser.add_argument('--max-books-per-author', type=int, default=10000)
+        parser.add_argument(
+            '--description-length', type=parse_range, default=(0, 1000), help='MIN:MAX characters, uniform',
+        )
+        parser.add_argument('--days', type=int, default=365, help='Users and books are spread over the last days')
+        parser.add_argument('--prefix', default='generated', help='Usernames are the prefix with a number')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed', type=int, help='Generate the same data on every run')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create without COPY')
+        parser.add_argument('--skip-search-index', action='store_true', help='Leave search vectors empty')
+
+    def handle(self, *args, users, prefix, password, seed, batch_size, skip_search_index, **options):
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Users named {prefix}* exist already, choose another --prefix')
+        generator = DataGenerator(
+            random.Random(seed),
+            books_per_author=options['books_per_author'],
+            distribution=options['distribution'],
+            max_books=options['max_books_per_author'],
+            description_length=options['description_length'],
+            days=options['days'],
+            now=time.time(),
+        )
+        use_copy = connection.vendor == 'postgresql'
+
+        def save(model, columns, rows):
+            if use_copy:
+                copy_rows(model, columns, rows)
+            else:
+                create_rows(model, columns, rows, batch_size)
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            save(User, USER_COLUMNS, generator.user_rows(prefix, users, make_password(password)))
+            # read before the books are written, the connection can not fetch rows during COPY
+            author_ids = array('q', User.objects.filter(username__startswith=prefix).order_by('id').values_list(
+                'id', flat=True,
+            ))
+            last_book_id = Book.objects.aggregate(last=Max('id'))['last'] or 0
+            save(Book, BOOK_COLUMNS, generator.book_rows(author_ids))
+            books = self._record_changes(last_book_id)
+            if not skip_search_index:
+                update_search_vectors(Book.objects.filter(id__gt=last_book_id))
+
+        self.stdout.write(
+            f'Created {users} users and {books} books in {time.perf_counter() - started:.1f}s'
+            f' with {"COPY" if use_copy else "bulk_create"}',
+        )
+
+    def _record_changes(self, last_book_id):
+        # the books enter the change feed with one INSERT ... SELECT
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {changes} ({book_id}, {deleted}, {changed_at}, {txid}) '
+                'SELECT {id}, %s, {created_at}, {current_txid} FROM {books} WHERE {id} > %s ORDER BY {id}'.format(
+                    changes=quote(BookChange._meta.db_table),
+                    books=quote(Book._meta.db_table),
+                    book_id=quote('book_id'),
+                    deleted=quote('deleted'),
+                    changed_at=quote('changed_at'),
+                    id=quote('id'),
+                    created_at=quote('created_at'),
+                    txid=quote('txid'),
+                    current_txid=transaction_id_sql(connection),
+                ),
+                [False, last_book_id],
+            )
+            return cursor.rowcount
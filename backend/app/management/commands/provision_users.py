@@ -0,0 +1,80 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.models import User
+
+
+def _init_worker():
+    # worker processes started with `spawn` do not inherit the configured settings
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+
+def read_users(path):
+    """
+    Reads users from a CSV file with a header row or from an NDJSON file
+    """
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(file))
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def build_user(row):
+    return User(
+        username=row['username'],
+        email=row.get('email') or '',
+        first_name=row.get('first_name') or '',
+        last_name=row.get('last_name') or '',
+        age=row.get('age') or None,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Creates users from a CSV or NDJSON file, hashing passwords in a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='.csv file with a header row or .ndjson file')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes hashing passwords')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, workers, batch_size, **options):
+        rows = read_users(path)
+        for number, row in enumerate(rows, start=1):
+            if not row.get('username') or not row.get('password'):
+                raise CommandError(f'Row {number} has no username or password')
+
+        usernames = [row['username'] for row in rows]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        new_rows = list({row['username']: row for row in rows if row['username'] not in existing}.values())
+
+        users = []
+        for row in new_rows:
+            user = build_user(row)
+            try:
+                user.clean_fields(exclude=['password'])
+            except ValidationError as exc:
+                raise CommandError(f'User {row["username"]} is not valid: {exc.message_dict}')
+            users.append(user)
+
+        passwords = [row['password'] for row in new_rows]
+        if workers > 1 and len(passwords) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                hashes = list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // workers)))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        for user, password_hash in zip(users, hashes):
+            user.password = password_hash
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=batch_size)
+
+        self.stdout.write(f'Created {len(users)} users, skipped {len(rows) - len(users)} existing or repeated')
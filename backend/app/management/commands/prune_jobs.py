@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from app.jobs import prune_jobs
+
+
+class Command(BaseCommand):
+    help = 'Deletes jobs finished more than JOBS_RETENTION seconds ago'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {prune_jobs()} finished jobs')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from app.cache import invalidate_profiles
+from app.counters import reconcile_counters, stale_counters
+
+
+class Command(BaseCommand):
+    help = 'Recounts books_count and last_book_at of users whose counters drifted from their books'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the users with wrong counters')
+
+    def handle(self, *args, dry_run, **options):
+        stale = list(stale_counters().values_list('id', 'username', 'books_count', 'real_books_count'))
+        for user_id, username, books_count, real_books_count in stale:
+            self.stdout.write(f'{username} (id {user_id}): books_count {books_count}, books {real_books_count}')
+        if dry_run or not stale:
+            self.stdout.write(f'{len(stale)} users with wrong counters')
+            return
+        user_ids = [user_id for user_id, *_ in stale]
+        reconcile_counters(user_ids)
+        invalidate_profiles(*user_ids)
+        self.stdout.write(f'Fixed counters of {len(stale)} users')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.jobs import work
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs from the Redis queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=int, default=5, help='Seconds to wait for a job at a time')
+        parser.add_argument('--once', action='store_true', help='Stop when the queue is empty')
+
+    def handle(self, *args, timeout, once, **options):
+        if not settings.JOBS_REDIS_URL:
+            raise CommandError('Set JOBS_REDIS_URL or REDIS_URL to run the worker')
+        self.stdout.write(f'Waiting for jobs in {settings.JOBS_QUEUE}')
+        try:
+            work(timeout=timeout, once=once)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
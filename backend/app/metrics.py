@@ -0,0 +1,115 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+_IN_LIST = re.compile(r'IN \(\?(?:, \?)*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def normalize_sql(sql):
+    """
+    Replaces literals and placeholder lists, so the same query with different values looks the same
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql).replace('%s', '?')
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording the number, duration and fingerprints of the queries
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.statements.setdefault(key, normalize_sql(sql))
+
+    @property
+    def duplicates(self):
+        return {key: count for key, count in self.fingerprints.items() if count > 1}
+
+    def server_timing(self):
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+class QueryMetrics:
+    """
+    Per view totals of requests, queries, database time and duplicated queries of this process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = Counter()
+            self.queries = Counter()
+            self.seconds = defaultdict(float)
+            self.duplicates = defaultdict(Counter)
+            self.statements = {}
+
+    def record(self, view, recorder):
+        with self._lock:
+            self.requests[view] += 1
+            self.queries[view] += recorder.count
+            self.seconds[view] += recorder.duration
+            for key, count in recorder.duplicates.items():
+                self.duplicates[view][key] += count - 1
+                self.statements[key] = recorder.statements[key]
+
+    def render(self, extra=()):
+        """
+        Renders the metrics in the Prometheus text format
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+        with self._lock:
+            metric('app_http_requests_total', 'counter', 'Requests per view.',
+                   [({'view': view}, count) for view, count in sorted(self.requests.items())])
+            metric('app_db_queries_total', 'counter', 'SQL queries per view.',
+                   [({'view': view}, count) for view, count in sorted(self.queries.items())])
+            metric('app_db_query_seconds_total', 'counter', 'Time spent in SQL queries per view.',
+                   [({'view': view}, round(seconds, 6)) for view, seconds in sorted(self.seconds.items())])
+            metric('app_db_duplicate_queries_total', 'counter', 'Repeated SQL queries within one request.',
+                   [({'view': view, 'fingerprint': key}, count)
+                    for view, counter in sorted(self.duplicates.items()) for key, count in sorted(counter.items())])
+            metric('app_db_query_fingerprint_info', 'gauge', 'Normalized SQL of the duplicated queries.',
+                   [({'fingerprint': key, 'sql': sql}, 1) for key, sql in sorted(self.statements.items())])
+        for name, kind, help_text, samples in extra:
+            metric(name, kind, help_text, samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+query_metrics = QueryMetrics()
@@ -0,0 +1,108 @@
+import threading
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+
+from app.metrics import QueryRecorder, query_metrics
+from app.routers import mark_sticky, tracked_writes
+
+
+class QueryMetricsMiddleware:
+    """
+    Records SQL queries and database time of every request per view.
+    Adds them to the `Server-Timing` header and to the metrics endpoint.
+    Enabled with the QUERY_METRICS_ENABLED setting
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        query_metrics.record(match.view_name if match else '<unresolved>', recorder)
+        timing = recorder.server_timing()
+        if response.has_header('Server-Timing'):
+            timing = f'{response["Server-Timing"]}, {timing}'
+        response['Server-Timing'] = timing
+        return response
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Admits at most MAX_CONCURRENT_REQUESTS requests at a time in this process.
+    A request waiting longer than CONCURRENCY_QUEUE_TIMEOUT seconds for a slot is answered
+    with 503 before any work is done, instead of piling up on the database
+    """
+
+    def __init__(self, get_response):
+        if not settings.MAX_CONCURRENT_REQUESTS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slots = threading.BoundedSemaphore(settings.MAX_CONCURRENT_REQUESTS)
+
+    def __call__(self, request):
+        if request.path in settings.CONCURRENCY_LIMIT_EXEMPT_PATHS:
+            return self.get_response(request)
+        if not self.slots.acquire(timeout=settings.CONCURRENCY_QUEUE_TIMEOUT):
+            response = JsonResponse(
+                {'detail': 'Server is busy, try again later.'},
+                status=503,
+            )
+            response['Retry-After'] = '1'
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Keeps the reads of a user on the primary for REPLICA_STICKY_SECONDS after
+    a request of the user wrote to the database, so the user reads their own writes.
+    Runs in the mode of the handler, so async views are not adapted to a thread
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with tracked_writes() as writes:
+            response = self.get_response(request)
+        if writes:
+            self.mark_sticky(request)
+        return response
+
+    async def __acall__(self, request):
+        with tracked_writes() as writes:
+            response = await self.get_response(request)
+        if writes:
+            await sync_to_async(self.mark_sticky)(request)
+        return response
+
+    @staticmethod
+    def mark_sticky(request):
+        # DRF views set the user they authenticated on the request
+        user = getattr(request, 'user', None)
+        if settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+            mark_sticky(user)
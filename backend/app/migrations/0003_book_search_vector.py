@@ -0,0 +1,52 @@
+# Generated by Django 4.1 on 2026-10-18 03:01
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    GIN indexes exist only in Postgres, other databases just skip the index
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Book = apps.get_model('app', 'Book')
+    Book.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            django.contrib.postgres.search.SearchVector('title', weight='A', config=settings.SEARCH_CONFIG)
+            + django.contrib.postgres.search.SearchVector('short_description', weight='B', config=settings.SEARCH_CONFIG)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_alter_user_age'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        AddPostgresIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.1 on 2026-10-18 03:55
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def fill_book_counters(apps, schema_editor):
+    User = apps.get_model('app', 'User')
+    Book = apps.get_model('app', 'Book')
+    books = Book.objects.using(schema_editor.connection.alias).filter(author=OuterRef('pk')).order_by().values('author')
+    User.objects.using(schema_editor.connection.alias).update(
+        books_count=Coalesce(Subquery(books.annotate(count=Count('id')).values('count')), 0),
+        last_book_at=Subquery(books.annotate(last=Max('created_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='books_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_book_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-books_count', 'id'], name='user_books_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-last_book_at', 'id'], name='user_last_book_at_idx'),
+        ),
+        migrations.RunPython(fill_book_counters, migrations.RunPython.noop),
+    ]
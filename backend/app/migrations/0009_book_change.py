@@ -0,0 +1,37 @@
+# Generated by Django 4.1 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+def fill_book_changes(apps, schema_editor):
+    Book = apps.get_model('app', 'Book')
+    BookChange = apps.get_model('app', 'BookChange')
+    using = schema_editor.connection.alias
+    # every existing book is a change for clients syncing from scratch
+    BookChange.objects.using(using).bulk_create(
+        (BookChange(book_id=book_id) for book_id in Book.objects.using(using).order_by('id').values_list('id', flat=True)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_book_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['book_id', 'id'], name='book_change_book_id_idx')],
+            },
+        ),
+        migrations.RunPython(fill_book_changes, migrations.RunPython.noop),
+    ]
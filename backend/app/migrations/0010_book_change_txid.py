@@ -0,0 +1,30 @@
+# Generated by Django 4.1 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_book_change'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bookchange',
+            name='book_change_book_id_idx',
+        ),
+        migrations.AddField(
+            model_name='bookchange',
+            name='txid',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='bookchange',
+            index=models.Index(fields=['book_id', 'txid', 'id'], name='book_change_book_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookchange',
+            index=models.Index(fields=['txid', 'id'], name='book_change_txid_idx'),
+        ),
+    ]
@@ -1,12 +1,26 @@
+import uuid
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, router, transaction
 
 # Create your models here.
 
 
 class User(AbstractUser):
     age = models.IntegerField(validators=[MinValueValidator(10), MaxValueValidator(100)], blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # maintained by app.counters on every book change, fixed by `manage.py reconcile_book_counts`
+    books_count = models.PositiveIntegerField(default=0, editable=False)
+    last_book_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-books_count', 'id'], name='user_books_count_idx'),
+            models.Index(fields=['-last_book_at', 'id'], name='user_last_book_at_idx'),
+        ]
 
     def __str__(self):
         return f'{self.username}'
@@ -14,8 +28,95 @@ class User(AbstractUser):
 
 class Book(models.Model):
     title = models.CharField(max_length=50, blank=False, null=False)
-    author = models.ForeignKey(User, on_delete=models.CASCADE, blank=False, null=False, related_name='books')
+    # indexed by book_author_id_idx
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, blank=False, null=False, related_name='books', db_index=False,
+    )
     short_description = models.TextField(max_length=1000, blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # incremented on every update, compared by app.versioning.update_book to detect lost updates
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+            models.Index(fields=['author', 'id'], name='book_author_id_idx'),
+            models.Index(fields=['title', 'id'], name='book_title_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored author to find out whether it was changed on save
+        instance._loaded_author_id = instance.__dict__.get('author_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save receivers record the change feed entry, it commits together with the book
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Book, instance=self)):
+            super().save(*args, **kwargs)
+        self._loaded_author_id = self.author_id
 
     def __str__(self):
         return f'{self.title}'
+
+
+class BookChange(models.Model):
+    """
+    Entry of the book change feed recorded on every save and delete of a book.
+    Changes are ordered by the transaction that made them and then by id,
+    entries of deleted books are tombstones
+    """
+
+    book_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    # id of the writing transaction on Postgres, set by app.changes.record_changes
+    txid = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['book_id', 'txid', 'id'], name='book_change_book_id_idx'),
+            models.Index(fields=['txid', 'id'], name='book_change_txid_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.book_id} {"deleted" if self.deleted else "changed"}'
+
+
+class Job(models.Model):
+    """
+    Background job run by the `run_worker` command, kept for its status
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # finished jobs are pruned by age
+            models.Index(fields=['finished_at'], name='job_finished_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} {self.id}'
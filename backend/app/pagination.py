@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class BookCursorPagination(CursorPagination):
+    """
+    Keyset pagination of books ordered by primary key.
+    Every page is fetched with `WHERE id > <cursor> ORDER BY id LIMIT <size>`
+    using the primary key index, so deep pages cost the same as the first one
+    """
+
+    ordering = 'id'
+    page_size = settings.BOOKS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.BOOKS_MAX_PAGE_SIZE
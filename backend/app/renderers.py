@@ -0,0 +1,37 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson when it is installed.
+    The output is byte for byte the one of the DRF renderer for strings, integers,
+    booleans, null, lists and dicts. Indented output and objects like datetimes are
+    left to the DRF renderer. Floats may be written differently (1e16 and 1e+16),
+    so use it for responses without them
+    """
+
+    options = 0 if orjson is None else orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def _reject(self, obj):
+        raise TypeError(f'{type(obj).__name__} is rendered by the DRF renderer')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+                orjson is None
+                or data is None
+                or self.ensure_ascii
+                or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._reject, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # the DRF renderer escapes the line terminators invalid in JavaScript strings
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
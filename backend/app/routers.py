@@ -0,0 +1,97 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+STICKY_KEY = 'replica-sticky:{user_id}'
+
+# set for the reads of ReplicaReadMixin views, everything else uses the primary
+_use_replicas = ContextVar('use_replicas', default=False)
+# collects the writes of the current request for ReplicaStickinessMiddleware
+_writes = ContextVar('writes', default=None)
+
+
+def is_sticky(user):
+    """
+    Whether the user wrote recently enough for the replicas to miss the change
+    """
+    return bool(user and user.is_authenticated and cache.get(STICKY_KEY.format(user_id=user.pk)))
+
+
+def mark_sticky(user):
+    cache.set(STICKY_KEY.format(user_id=user.pk), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def replicas_allowed(user):
+    return bool(settings.DATABASE_REPLICAS) and not is_sticky(user)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Sends the reads made inside to the replicas, see `replicas_allowed()`
+    """
+    token = _use_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+@contextmanager
+def tracked_writes():
+    """
+    Yields the list of models written to inside
+    """
+    writes = []
+    token = _writes.set(writes)
+    try:
+        yield writes
+    finally:
+        _writes.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Routes reads of ReplicaReadMixin views to a random replica from DATABASE_REPLICAS.
+    Everything else keeps the default routing to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if _use_replicas.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        writes = _writes.get()
+        if writes is not None:
+            writes.append(model)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema from the primary
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaReadMixin:
+    """
+    Reads of safe requests go to the replicas, for a user who wrote in the last
+    REPLICA_STICKY_SECONDS they stay on the primary
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            self._replica_token = _use_replicas.set(replicas_allowed(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            self._replica_token = None
+            _use_replicas.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+
+# fields the search vector of a book is calculated from
+SEARCH_FIELDS = ('title', 'short_description')
+
+
+def book_search_vector(title='title', short_description='short_description'):
+    return (
+        SearchVector(title, weight='A', config=settings.SEARCH_CONFIG)
+        + SearchVector(short_description, weight='B', config=settings.SEARCH_CONFIG)
+    )
+
+
+def search_vector_stale(update_fields):
+    """
+    Whether a save of `update_fields` leaves the search vector of the book out of date
+    """
+    if update_fields is None:
+        return True
+    return 'search_vector' not in update_fields and not update_fields.isdisjoint(SEARCH_FIELDS)
+
+
+def full_text_supported(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def update_search_vectors(queryset):
+    """
+    Recalculates search vectors of the given books. Does nothing outside Postgres
+    """
+    if full_text_supported(queryset):
+        queryset.update(search_vector=book_search_vector())
+
+
+def search_books(queryset, query):
+    """
+    Returns books matching the query, the most relevant first.
+    Postgres uses the GIN indexed search vector, other databases fall back to
+    case insensitive substring matching of every word
+    """
+    if full_text_supported(queryset):
+        search_query = SearchQuery(query, config=settings.SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+        ).order_by('-rank', 'id')
+
+    for word in query.split():
+        queryset = queryset.filter(Q(title__icontains=word) | Q(short_description__icontains=word))
+    return queryset.annotate(
+        rank=Case(When(title__icontains=query, then=Value(1.0)), default=Value(0.4), output_field=FloatField()),
+    ).order_by('-rank', 'id')
@@ -1,6 +1,17 @@
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth import authenticate
 from rest_framework import serializers
 
-from app.models import User, Book
+from app.authentication import user_from_refresh_token
+from app.cache import invalidate_profiles_on_commit
+from app.changes import record_changes
+from app.counters import books_added
+from app.events import publish_book_events
+from app.models import User, Book, Job
+from app.search import full_text_supported
+from app.tasks import index_books
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -44,11 +55,197 @@ class BookSerializer(serializers.ModelSerializer):
         )
 
 
+class BookDetailSerializer(BookSerializer):
+    """
+    Book with its version. A version sent with an update must match the stored one
+    """
+
+    version = serializers.IntegerField(required=False, min_value=1)
+
+    class Meta(BookSerializer.Meta):
+        fields = BookSerializer.Meta.fields + ('version', )
+
+
+class BookBatchSerializer(BookDetailSerializer):
+    """
+    Book of a batch fetch, with its id
+    """
+
+    class Meta(BookDetailSerializer.Meta):
+        fields = ('id', ) + BookDetailSerializer.Meta.fields
+
+
+class BookIdsSerializer(serializers.Serializer):
+    """
+    Ids of the books of a batch fetch, repeated ids are fetched once
+    """
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, ids):
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > settings.BOOKS_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {settings.BOOKS_BATCH_MAX_SIZE} ids.',
+            )
+        return ids
+
+
+class CompactReader:
+    """
+    Read-only representation of model rows built from `values()` of exactly the needed columns.
+    Gives the output of a ModelSerializer with plain fields at a fraction of its per-field cost
+    """
+
+    def __init__(self, **fields):
+        # output name=column
+        self.names = tuple(fields)
+        self.columns = tuple(fields.values())
+        getter = itemgetter(*self.columns)
+        self._getter = getter if len(self.columns) > 1 else lambda row: (getter(row),)
+
+    def values(self, queryset, *extra_columns):
+        return queryset.values(*self.columns, *extra_columns)
+
+    def to_representation(self, rows):
+        names, getter = self.names, self._getter
+        return [dict(zip(names, getter(row))) for row in rows]
+
+
+BOOK_READER = CompactReader(title='title', short_description='short_description', author='author_id')
+
+
+class CompactBooksField(serializers.Field):
+    """
+    Books of a user read with one `values()` query, same output as a list of `BookSerializer`
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return BOOK_READER.to_representation(BOOK_READER.values(value.all()))
+
+
+class BookBulkListSerializer(serializers.ListSerializer):
+    """
+    Serializer for batches of books. Authors of the whole batch are checked with one query
+    and books are saved with `bulk_create`
+    """
+
+    def _author_id(self, item):
+        """
+        Author id of a book not validated yet, None when the author field itself is invalid
+        """
+        try:
+            return self.child.fields['author'].run_validation(item['author'])
+        except (KeyError, TypeError, serializers.ValidationError):
+            return None
+
+    def to_internal_value(self, data):
+        try:
+            books = super().to_internal_value(data)
+            errors = [{} for _ in books]
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            books, errors = None, exc.detail
+
+        # authors are checked together with the other fields, so every invalid book is reported at once
+        author_ids = [self._author_id(item) for item in data]
+        existing_ids = set(User.objects.filter(
+            id__in={author_id for author_id in author_ids if author_id is not None},
+        ).values_list('id', flat=True))
+        for error, author_id in zip(errors, author_ids):
+            if author_id is not None and author_id not in existing_ids:
+                error['author'] = [f'Invalid pk "{author_id}" - object does not exist.']
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return books
+
+    def create(self, validated_data):
+        batch_size = self.context.get('batch_size', settings.BOOKS_BULK_BATCH_SIZE)
+        books = Book.objects.bulk_create([Book(**book) for book in validated_data], batch_size=batch_size)
+        # bulk_create does not send post_save signals
+        books_added(books)
+        record_changes(book.pk for book in books)
+        publish_book_events('created', books)
+        invalidate_profiles_on_commit(*(book.author_id for book in books))
+        if full_text_supported(Book.objects.all()):
+            index_books.enqueue([book.pk for book in books])
+        return books
+
+
+class BookBulkSerializer(serializers.ModelSerializer):
+    author = serializers.IntegerField(source='author_id', min_value=1)
+
+    class Meta:
+        model = Book
+        fields = (
+            'title',
+            'short_description',
+            'author',
+        )
+        list_serializer_class = BookBulkListSerializer
+
+
 class UserSerializer(serializers.ModelSerializer):
-    books = serializers.ListSerializer(child=BookSerializer())
+    books = CompactBooksField()
 
     class Meta:
         model = User
         exclude = (
             'password',
         )
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    """
+    Checks the credentials of a user requesting tokens
+    """
+
+    username = serializers.CharField(write_only=True)
+    password = serializers.CharField(write_only=True, style={'input_type': 'password'})
+
+    def validate(self, attrs):
+        user = authenticate(self.context.get('request'), username=attrs['username'], password=attrs['password'])
+        if user is None:
+            raise serializers.ValidationError('Unable to log in with provided credentials.')
+        attrs['user'] = user
+        return attrs
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        user = user_from_refresh_token(attrs['refresh'])
+        if user is None:
+            raise serializers.ValidationError('Invalid or expired refresh token.')
+        attrs['user'] = user
+        return attrs
+
+
+class AuthorRankSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = (
+            'id',
+            'username',
+            'books_count',
+            'last_book_at',
+        )
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            'id',
+            'name',
+            'status',
+            'attempts',
+            'created_at',
+            'finished_at',
+        )
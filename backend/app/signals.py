@@ -0,0 +1,64 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from app.cache import invalidate_profiles_on_commit
+from app.changes import record_changes
+from app.counters import books_added, books_removed
+from app.events import publish_book_events
+from app.models import Book, User
+from app.search import full_text_supported, search_vector_stale
+from app.tasks import index_books, process_new_book
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_author_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(instance.author_id, getattr(instance, '_loaded_author_id', None))
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, **kwargs):
+    loaded_author_id = getattr(instance, '_loaded_author_id', None)
+    if created:
+        books_added([instance])
+    elif loaded_author_id is not None and loaded_author_id != instance.author_id:
+        books_removed(loaded_author_id)
+        books_added([instance])
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):
+    books_removed(instance.author_id)
+
+
+@receiver(post_save, sender=Book)
+def queue_book_jobs(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # the view reports the job to the client
+        instance.job = process_new_book.enqueue(instance.pk, user_id=instance.author_id)
+    elif search_vector_stale(update_fields) and full_text_supported(Book.objects.using(instance._state.db)):
+        index_books.enqueue([instance.pk], user_id=instance.author_id)
+
+
+@receiver(post_save, sender=Book)
+def record_saved_book(sender, instance, **kwargs):
+    record_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def record_deleted_book(sender, instance, **kwargs):
+    record_changes([instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=Book)
+def publish_saved_book(sender, instance, created, **kwargs):
+    publish_book_events('created' if created else 'updated', [instance])
+
+
+@receiver(post_delete, sender=Book)
+def publish_deleted_book(sender, instance, **kwargs):
+    publish_book_events('deleted', [instance])
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(instance.pk)
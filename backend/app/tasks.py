@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from app.jobs import job
+from app.models import Book
+from app.search import update_search_vectors
+
+
+@job
+def index_books(book_ids):
+    """
+    Recalculates search vectors of the books
+    """
+    update_search_vectors(Book.objects.filter(pk__in=book_ids))
+
+
+@job
+def notify_book_created(book_id):
+    """
+    Emails the author about the new book
+    """
+    book = Book.objects.select_related('author').filter(pk=book_id).first()
+    if book is None or not book.author.email:
+        return
+    send_mail(
+        subject=f'Your book "{book.title}" is published',
+        message=f'Hello {book.author.username},\n\nyour book "{book.title}" is now available to readers.',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[book.author.email],
+    )
+
+
+@job
+def process_new_book(book_id):
+    """
+    Side effects of creating a book, run off the request path
+    """
+    index_books([book_id])
+    notify_book_created(book_id)
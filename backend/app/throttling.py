@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parses rates like `10/minute` or `100/h` into the number of requests and the window in seconds
+    """
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class LocalWindowStore:
+    """
+    Sliding windows kept in the memory of the process
+    """
+
+    def __init__(self):
+        self._windows = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        """
+        Records a request unless `limit` requests were made in the last `window` seconds.
+        Returns whether the request is allowed and the seconds to wait otherwise
+        """
+        now = time.monotonic()
+        with self._lock:
+            hits = self._windows[key]
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) < limit:
+                hits.append(now)
+                return True, 0.0
+            return False, hits[0] + window - now
+
+
+class RedisWindowStore:
+    """
+    Sliding windows kept in Redis sorted sets shared by all processes.
+    Every check is a single atomic script using the Redis clock.
+    Requests are let through when Redis is not reachable
+    """
+
+    script = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local window = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+    if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+        redis.call('ZADD', KEYS[1], now, ARGV[3])
+        redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+        return {1, '0'}
+    end
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return {0, tostring(tonumber(oldest[2]) + window - now)}
+    """
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._hit = self.client.register_script(self.script)
+
+    def hit(self, key, limit, window):
+        try:
+            allowed, wait = self._hit(keys=[key], args=[limit, window, uuid.uuid4().hex])
+        except redis.RedisError as exc:
+            logger.warning('Rate limits are not checked: %s', exc)
+            return True, 0.0
+        return bool(allowed), float(wait)
+
+
+_window_store = None
+_window_store_lock = threading.Lock()
+
+
+def window_store():
+    """
+    Returns the process wide store of the rate limit windows, in Redis when RATE_LIMIT_REDIS_URL is set
+    """
+    global _window_store
+    if _window_store is None:
+        with _window_store_lock:
+            if _window_store is None:
+                url = settings.RATE_LIMIT_REDIS_URL
+                _window_store = RedisWindowStore(url) if url else LocalWindowStore()
+    return _window_store
+
+
+@receiver(setting_changed)
+def reset_window_store(setting, **kwargs):
+    global _window_store
+    if setting in ('RATE_LIMITS', 'RATE_LIMIT_REDIS_URL'):
+        _window_store = None
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Applies the RATE_LIMITS of the view `throttle_scope`: a `user` limit per authenticated
+    user and an `ip` limit per client address. Unlike the fixed windows of the DRF throttles
+    a burst at the edge of two windows can not double the rate
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_cache_key(self, kind, request):
+        if kind == 'user':
+            return request.user.pk if request.user and request.user.is_authenticated else None
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        for kind, rate in settings.RATE_LIMITS.get(scope, {}).items():
+            ident = self.get_cache_key(kind, request)
+            if rate is None or ident is None:
+                continue
+            limit, window = parse_rate(rate)
+            allowed, self.wait_seconds = window_store().hit(f'rate:{scope}:{kind}:{ident}', limit, window)
+            if not allowed:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
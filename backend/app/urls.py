@@ -1,20 +1,55 @@
 from django.urls import path, include
 
-from app.views import UserRegistrationAPIView, BookListCreateApiView, BookRetrieveUpdateApiView, OwnUser
+from app.async_views import AsyncBookListCreateView, AsyncBookRetrieveUpdateView, AsyncOwnUser
+from app.views import (
+    UserRegistrationAPIView,
+    BookListCreateApiView,
+    BookRetrieveUpdateApiView,
+    BookBatchApiView,
+    BookChangesApiView,
+    OwnUser,
+    ProfileCacheStats,
+    BookBulkCreateApiView,
+    BookSearchApiView,
+    BookExportApiView,
+    UserExportApiView,
+    JobRetrieveApiView,
+    AuthorLeaderboardApiView,
+)
 
 user_urls = [
     path('create_user/', UserRegistrationAPIView.as_view(), name='create-user'),
     path('own/', OwnUser.as_view(), name='own'),
+    path('own/cache_stats/', ProfileCacheStats.as_view(), name='own-cache-stats'),
+    path('leaderboard/', AuthorLeaderboardApiView.as_view(), name='users-leaderboard'),
+    path('export/<str:export_format>/', UserExportApiView.as_view(), name='users-export'),
 ]
 
 book_urls = [
     path('', BookListCreateApiView.as_view(), name='books-all'),
     path('create_book/', BookListCreateApiView.as_view(), name='create-book'),
+    path('bulk/', BookBulkCreateApiView.as_view(), name='books-bulk'),
+    path('batch/', BookBatchApiView.as_view(), name='books-batch'),
+    path('changes/', BookChangesApiView.as_view(), name='books-changes'),
+    path('search/', BookSearchApiView.as_view(), name='books-search'),
+    path('export/<str:export_format>/', BookExportApiView.as_view(), name='books-export'),
     path('<int:pk>/', BookRetrieveUpdateApiView.as_view(), name='book'),
     path('<int:pk>/', BookRetrieveUpdateApiView.as_view(), name='update_book'),
 ]
 
+job_urls = [
+    path('<uuid:pk>/', JobRetrieveApiView.as_view(), name='job'),
+]
+
+async_urls = [
+    path('users/own/', AsyncOwnUser.as_view(), name='async-own'),
+    path('books/', AsyncBookListCreateView.as_view(), name='async-books-all'),
+    path('books/<int:pk>/', AsyncBookRetrieveUpdateView.as_view(), name='async-book'),
+]
+
 urlpatterns = [
     path('users/', include(user_urls)),
     path('books/', include(book_urls)),
+    path('jobs/', include(job_urls)),
+    path('async/', include(async_urls)),
 ]
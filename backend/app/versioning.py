@@ -0,0 +1,142 @@
+from django.core.exceptions import PermissionDenied
+from django.db import connections, router, transaction
+from django.db.models import F, Value
+from django.db.models.signals import post_save
+from django.db.models.sql import Query
+from django.utils import timezone
+
+from app.models import Book
+from app.search import SEARCH_FIELDS, book_search_vector
+
+# columns read back after an update, the search vector is never sent to clients
+BOOK_COLUMNS = tuple(field for field in Book._meta.concrete_fields if field.name != 'search_vector')
+
+
+class VersionConflict(Exception):
+    """
+    The book was changed since the version the client read
+    """
+
+    def __init__(self, version):
+        super().__init__(f'The book is at version {version}')
+        self.version = version
+
+
+def _search_vector_sql(connection, values):
+    # columns in SET expressions have the values from before the update, the changed ones are passed
+    new_values = {field.name: Value(value) for field, value in values.items() if field.name in SEARCH_FIELDS}
+    query = Query(Book)
+    vector = book_search_vector(**new_values).resolve_expression(query, allow_joins=False, for_save=True)
+    return query.get_compiler(connection=connection).compile(vector)
+
+
+def _update_returning(connection, pk, author_id, values, version, search_vector=False):
+    quote = connection.ops.quote_name
+    assignments = [f'{quote(field.column)} = %s' for field in values]
+    assignments.append(f'{quote("version")} = {quote("version")} + 1')
+    params = [field.get_db_prep_save(value, connection) for field, value in values.items()]
+    if search_vector:
+        vector_sql, vector_params = _search_vector_sql(connection, values)
+        assignments.append(f'{quote("search_vector")} = {vector_sql}')
+        params.extend(vector_params)
+    conditions = [f'{quote("id")} = %s', f'{quote("author_id")} = %s']
+    params += [pk, author_id]
+    if version is not None:
+        conditions.append(f'{quote("version")} = %s')
+        params.append(version)
+    sql = 'UPDATE {table} SET {assignments} WHERE {conditions} RETURNING {columns}'.format(
+        table=quote(Book._meta.db_table),
+        assignments=', '.join(assignments),
+        conditions=' AND '.join(conditions),
+        columns=', '.join(quote(field.column) for field in BOOK_COLUMNS),
+    )
+    # the raw queryset converts the returned columns like a SELECT would
+    return next(iter(Book.objects.raw(sql, params, using=connection.alias)), None)
+
+
+def _update_then_select(connection, pk, author_id, values, version):
+    books = Book.objects.using(connection.alias).filter(pk=pk, author_id=author_id)
+    if version is not None:
+        books = books.filter(version=version)
+    if not books.update(version=F('version') + 1, **{field.attname: value for field, value in values.items()}):
+        return None
+    return Book.objects.using(connection.alias).only(*(field.attname for field in BOOK_COLUMNS)).get(pk=pk)
+
+
+def _select_unchanged(connection, pk, author_id, version):
+    books = Book.objects.using(connection.alias).filter(pk=pk, author_id=author_id)
+    if version is not None:
+        books = books.filter(version=version)
+    return books.only(*(field.attname for field in BOOK_COLUMNS)).first()
+
+
+def supports_update_returning(connection):
+    """
+    Whether the database has UPDATE ... RETURNING. `can_return_columns_from_insert` is about INSERT only
+    and is also set by MariaDB, which can not return columns from an UPDATE
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _update_failure(connection, pk, author_id):
+    book = Book.objects.using(connection.alias).filter(pk=pk).values('author_id', 'version').first()
+    if book is None:
+        return Book.DoesNotExist()
+    if book['author_id'] != author_id:
+        return PermissionDenied()
+    return VersionConflict(book['version'])
+
+
+def update_book(pk, author_id, changes, version=None):
+    """
+    Applies `changes` to the book of the author and increments its version in one conditional UPDATE,
+    so the ownership check and the write take a single round trip. With `version` the book
+    is updated only if nobody changed it since that version was read.
+
+    Raises Book.DoesNotExist, PermissionDenied for books of other authors and VersionConflict,
+    finding out which one with a second query only when the update matched no book.
+    Databases without UPDATE ... RETURNING read the updated book back with a second query.
+    Without changes the book is only checked and returned, keeping its version
+    """
+    connection = connections[router.db_for_write(Book)]
+    if not changes:
+        book = _select_unchanged(connection, pk, author_id, version)
+        if book is None:
+            raise _update_failure(connection, pk, author_id)
+        return book
+
+    values = {}
+    for name, value in changes.items():
+        field = Book._meta.get_field(name)
+        values[field] = value.pk if field.is_relation else value
+    values[Book._meta.get_field('updated_at')] = timezone.now()
+    update_fields = {*changes, 'updated_at', 'version'}
+    # Postgres recalculates the search vector in the same UPDATE, no job has to reindex the book
+    search_vector = connection.vendor == 'postgresql' and not update_fields.isdisjoint(SEARCH_FIELDS)
+    if search_vector:
+        update_fields.add('search_vector')
+
+    # the receivers record the change feed entry, it commits together with the UPDATE
+    with transaction.atomic(using=connection.alias):
+        if supports_update_returning(connection):
+            book = _update_returning(connection, pk, author_id, values, version, search_vector)
+        else:
+            book = _update_then_select(connection, pk, author_id, values, version)
+        if book is None:
+            raise _update_failure(connection, pk, author_id)
+
+        # the UPDATE skips Model.save(), the receivers keep caches, counters and the search index in sync
+        book._loaded_author_id = author_id
+        post_save.send(
+            sender=Book,
+            instance=book,
+            created=False,
+            update_fields=frozenset(update_fields),
+            raw=False,
+            using=connection.alias,
+        )
+    return book
@@ -1,12 +1,48 @@
-import requests
+from django.conf import settings
 from django.contrib.auth.views import LoginView, LogoutView
-from rest_framework import generics, status
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import generics, serializers, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from app.models import Book, User
-from app.serializers import UserCreateSerializer, BookSerializer, UserSerializer
+from app.authentication import CachedBasicAuthentication, SignedTokenAuthentication, issue_tokens
+from app.cache import get_cached_profile, cache_profile, profile_cache_stats
+from app.changes import START, changes_since, decode_sync_token, encode_sync_token
+from app.conditional import book_etag, book_last_modified, profile_etag, profile_last_modified
+from app.exporters import EXPORT_FORMATS, BOOK_EXPORT_FIELDS, USER_EXPORT_FIELDS
+from app.filters import BookFilterBackend, StableOrderingFilter
+from app.health import upstream_health
+from app.metrics import query_metrics
+from app.models import Book, User, Job
+from app.pagination import BookCursorPagination
+from app.parsers import NDJSONParser
+from app.renderers import FastJSONRenderer
+from app.routers import ReplicaReadMixin
+from app.search import search_books
+from app.throttling import SlidingWindowThrottle
+from app.versioning import VersionConflict, update_book
+from app.serializers import (
+    UserCreateSerializer,
+    BookSerializer,
+    BookDetailSerializer,
+    BookBatchSerializer,
+    BookIdsSerializer,
+    UserSerializer,
+    BookBulkSerializer,
+    BOOK_READER,
+    JobSerializer,
+    AuthorRankSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
+)
 
 
 class UserRegistrationAPIView(generics.CreateAPIView):
@@ -16,18 +52,64 @@ class UserRegistrationAPIView(generics.CreateAPIView):
 
     serializer_class = UserCreateSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (SlidingWindowThrottle,)
+    throttle_scope = 'register'
 
 
-class OwnUser(generics.RetrieveAPIView):
+class OwnUser(ReplicaReadMixin, generics.RetrieveAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    @method_decorator(condition(etag_func=profile_etag, last_modified_func=profile_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         user_id = request.user.id
-        user = User.objects.filter(id=user_id).prefetch_related('books').first()
-        serializer = self.get_serializer(user)
+        data = get_cached_profile(user_id)
+        if data is None:
+            user = User.objects.filter(id=user_id).first()
+            data = self.get_serializer(user).data
+            cache_profile(user_id, data)
+
+        return Response({'user': data})
+
+
+class AuthorLeaderboardApiView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    Authors with the most books or the latest books, read from the maintained counters
+    along an index instead of counting books
+    """
+
+    serializer_class = AuthorRankSerializer
+    permission_classes = (IsAuthenticated, )
+    pagination_class = None
+    orderings = {
+        'books_count': ('books_count__gt', 0, '-books_count'),
+        'last_book_at': ('last_book_at__isnull', False, '-last_book_at'),
+    }
+
+    def get_queryset(self):
+        ordering = self.request.query_params.get('order_by', 'books_count')
+        limit = serializers.IntegerField(min_value=1, max_value=settings.LEADERBOARD_MAX_SIZE).run_validation(
+            self.request.query_params.get('limit', settings.LEADERBOARD_SIZE),
+        )
+        if ordering not in self.orderings:
+            raise serializers.ValidationError({'order_by': f'Choose one of {", ".join(self.orderings)}'})
+        lookup, value, order = self.orderings[ordering]
+        return User.objects.filter(**{lookup: value}).order_by(order, 'id')[:limit]
+
+
+class ProfileCacheStats(APIView):
+    """
+    Hit and miss counters of the own user profile cache. Allowed for staff only
+    """
+
+    permission_classes = (IsAdminUser,)
 
-        return Response({'user': serializer.data})
+    def get(self, request, *args, **kwargs):
+        return Response(profile_cache_stats())
 
 
 class Login(LoginView):
@@ -48,30 +130,270 @@ class Logout(LogoutView):
         return LogoutView.as_view(next_page='/auth/api/v1/login/')(request)
 
 
-class BookListCreateApiView(generics.CreateAPIView, generics.ListAPIView):
-    authentication_classes = (SessionAuthentication, BasicAuthentication)
+class TokenObtainApiView(generics.GenericAPIView):
+    """
+    Issues an access and a refresh token for a username and password
+    """
+
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    serializer_class = TokenObtainSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(issue_tokens(serializer.validated_data['user']))
+
+
+class TokenRefreshApiView(TokenObtainApiView):
+    """
+    Issues new tokens for a refresh token
+    """
+
+    serializer_class = TokenRefreshSerializer
+
+
+class BookListCreateApiView(ReplicaReadMixin, generics.CreateAPIView, generics.ListAPIView):
+    authentication_classes = (SessionAuthentication, SignedTokenAuthentication, CachedBasicAuthentication)
     serializer_class = BookSerializer
     permission_classes = (IsAuthenticated, )
+    pagination_class = BookCursorPagination
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    filter_backends = (BookFilterBackend, StableOrderingFilter)
+    ordering_fields = ('id', 'title')
+    ordering = ('id', )
+    throttle_scope = 'book_create'
     queryset = Book.objects.all().select_related('author')
 
+    def get_throttles(self):
+        # only creation is limited, reads are cheap
+        return [SlidingWindowThrottle()] if self.request.method == 'POST' else []
+
+    def list(self, request, *args, **kwargs):
+        # reads only the listed columns and the `id` of the cursor instead of model instances
+        rows = self.paginate_queryset(BOOK_READER.values(self.filter_queryset(Book.objects.all()), 'id'))
+        return self.get_paginated_response(BOOK_READER.to_representation(rows))
+
+    def perform_create(self, serializer):
+        self.job = serializer.save().job
+
     def post(self, request, *args, **kwargs):
-        some_response = requests.get('https://www.onliner.by')
-        if some_response.status_code != 200:
+        if not upstream_health().is_available():
             return Response({'message': 'Can not create book. Invalid url'}, status=status.HTTP_400_BAD_REQUEST)
         book = super().post(request, args, kwargs)
+        if book.status_code == status.HTTP_201_CREATED:
+            # indexing and notifications run in the background, the job tells when they are done
+            book.data['job'] = str(self.job.id)
         return book
 
 
-class BookRetrieveUpdateApiView(generics.RetrieveUpdateAPIView):
+class BookRetrieveUpdateApiView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
+    """
+    Books are updated by their authors only, with the ownership check, the optional
+    version check and the write done by one conditional UPDATE
+    """
 
-    serializer_class = BookSerializer
+    serializer_class = BookDetailSerializer
     queryset = Book.objects.all().select_related('author')
     permission_classes = (IsAuthenticated, )
 
+    @method_decorator(condition(etag_func=book_etag, last_modified_func=book_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def put(self, request, *args, **kwargs):
-        user_id = request.user.id
-        instance = self.get_object()
-        if instance.author.id == user_id:
-            updated = super().patch(request, args, kwargs)
-            return updated
-        return Response({'message': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        version = changes.pop('version', None)
+        try:
+            book = update_book(self.kwargs['pk'], request.user.id, changes, version)
+        except Book.DoesNotExist:
+            raise Http404
+        except PermissionDenied:
+            return Response({'message': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
+        except VersionConflict as exc:
+            return Response(
+                {'message': 'Book was changed by another request', 'version': exc.version},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(book).data)
+
+    def patch(self, request, *args, **kwargs):
+        return self.put(request, *args, **kwargs)
+
+
+class BookBatchApiView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    Books with the given ids in the requested order, read with one query.
+    Ids are sent as `?ids=1,2,3` or as `{"ids": [1, 2, 3]}`, ids of missing books are listed in `missing`
+    """
+
+    serializer_class = BookBatchSerializer
+    permission_classes = (IsAuthenticated, )
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    queryset = Book.objects.all().select_related('author')
+
+    def get(self, request, *args, **kwargs):
+        ids = [pk for value in request.query_params.getlist('ids') for pk in value.split(',') if pk]
+        return self.batch({'ids': ids})
+
+    def post(self, request, *args, **kwargs):
+        return self.batch(request.data)
+
+    def batch(self, data):
+        ids_serializer = BookIdsSerializer(data=data)
+        ids_serializer.is_valid(raise_exception=True)
+        ids = ids_serializer.validated_data['ids']
+        books = self.get_queryset().in_bulk(ids)
+        return Response({
+            'results': self.get_serializer([books[pk] for pk in ids if pk in books], many=True).data,
+            'missing': [pk for pk in ids if pk not in books],
+        })
+
+
+class BookChangesApiView(ReplicaReadMixin, generics.GenericAPIView):
+    """
+    Books created, updated and deleted since the sync token of the previous response.
+    Without a token the feed starts from the first book, clients repeat the request
+    with the returned token while `has_more` is true
+    """
+
+    serializer_class = BookBatchSerializer
+    permission_classes = (IsAuthenticated, )
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def get(self, request, *args, **kwargs):
+        page_size = serializers.IntegerField(min_value=1, max_value=settings.BOOK_CHANGES_MAX_PAGE_SIZE).run_validation(
+            request.query_params.get('page_size', settings.BOOK_CHANGES_PAGE_SIZE),
+        )
+        token = request.query_params.get('since')
+        cursor = START if token is None else decode_sync_token(token)
+        if cursor is None:
+            raise serializers.ValidationError({'since': 'Invalid sync token'})
+        page = changes_since(cursor, page_size)
+        return Response({
+            'updated': self.get_serializer(page.books, many=True).data,
+            'deleted': page.deleted_ids,
+            'sync_token': encode_sync_token(page.cursor),
+            'has_more': page.has_more,
+        })
+
+
+class JobRetrieveApiView(ReplicaReadMixin, generics.RetrieveAPIView):
+    """
+    Status of a background job. Users see their own jobs, staff see all of them
+    """
+
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated, )
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(user_id=self.request.user.id)
+
+
+class BookSearchApiView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    Full-text search of books by title and short description, the most relevant first
+    """
+
+    serializer_class = BookSerializer
+    permission_classes = (IsAuthenticated, )
+    queryset = Book.objects.all().select_related('author')
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            return Book.objects.none()
+        return search_books(super().get_queryset(), query)[:settings.BOOKS_SEARCH_LIMIT]
+
+
+class BookBulkCreateApiView(generics.GenericAPIView):
+    """
+    Creates a batch of books sent as a JSON array or as NDJSON in one transaction
+    """
+
+    authentication_classes = (SessionAuthentication, SignedTokenAuthentication, CachedBasicAuthentication)
+    serializer_class = BookBulkSerializer
+    permission_classes = (IsAuthenticated, )
+    parser_classes = (JSONParser, NDJSONParser)
+    throttle_classes = (SlidingWindowThrottle,)
+    throttle_scope = 'book_bulk_create'
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('many', True)
+        kwargs.setdefault('allow_empty', False)
+        kwargs.setdefault('max_length', settings.BOOKS_BULK_MAX_ITEMS)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['batch_size'] = settings.BOOKS_BULK_BATCH_SIZE
+        return context
+
+    def post(self, request, *args, **kwargs):
+        if not upstream_health().is_available():
+            return Response({'message': 'Can not create book. Invalid url'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = [{'index': index, 'errors': error} for index, error in enumerate(errors) if error]
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            books = serializer.save()
+        return Response({'created': len(books)}, status=status.HTTP_201_CREATED)
+
+
+class ExportApiView(generics.GenericAPIView):
+    """
+    Streams the whole queryset row by row, so memory use does not grow with the table
+    """
+
+    export_name = None
+    export_fields = ()
+
+    def get(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        lines, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            lines(self.get_queryset(), self.export_fields, settings.EXPORT_CHUNK_SIZE),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{export_format}"'
+        return response
+
+
+class BookExportApiView(ExportApiView):
+    authentication_classes = (SessionAuthentication, SignedTokenAuthentication, CachedBasicAuthentication)
+    permission_classes = (IsAuthenticated, )
+    queryset = Book.objects.all()
+    export_name = 'books'
+    export_fields = BOOK_EXPORT_FIELDS
+
+
+class UserExportApiView(ExportApiView):
+    authentication_classes = (SessionAuthentication, SignedTokenAuthentication, CachedBasicAuthentication)
+    permission_classes = (IsAdminUser, )
+    queryset = User.objects.all()
+    export_name = 'users'
+    export_fields = USER_EXPORT_FIELDS
+
+
+def metrics(request):
+    """
+    SQL query metrics of this process in the Prometheus text format
+    """
+    if not settings.QUERY_METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    cache_stats = profile_cache_stats()
+    extra = [
+        ('app_profile_cache_hits_total', 'counter', 'Own user profile cache hits.', [({}, cache_stats['hits'])]),
+        ('app_profile_cache_misses_total', 'counter', 'Own user profile cache misses.', [({}, cache_stats['misses'])]),
+    ]
+    return HttpResponse(query_metrics.render(extra), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once the apps are loaded
+from app.event_stream import BOOK_EVENTS_PATH, book_events  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # the event stream is served outside of Django, so its long-lived connections
+    # do not hold a thread or a slot of the concurrency limit
+    if scope['type'] == 'http' and scope['path'] == BOOK_EVENTS_PATH:
+        return await book_events(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,64 @@
+import threading
+
+from django.core.signals import setting_changed
+from django.db.backends.postgresql import base
+from django.dispatch import receiver
+
+from backend.postgresql_pool.creation import DatabaseCreation
+from backend.postgresql_pool.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def close_pools():
+    """
+    Disconnects the idle connections of every pool and forgets the pools.
+    Connections checked out at the time are disconnected when they are closed
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+@receiver(setting_changed)
+def reset_pools(setting, **kwargs):
+    if setting == 'DATABASES':
+        close_pools()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend borrowing connections from an in-process pool.
+    Closing the connection hands it back to the pool instead of disconnecting.
+    Every set of connection parameters has its own pool, so connections opened
+    before NAME changes, like when the test database is set up, are never reused
+    """
+
+    creation_class = DatabaseCreation
+    _pool = None
+
+    def get_pool(self, conn_params):
+        key = (self.alias, repr(sorted(conn_params.items())))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    max_size=self.settings_dict.get('POOL_MAX_SIZE', 10),
+                    timeout=self.settings_dict.get('POOL_TIMEOUT', 5.0),
+                    health_checks=self.settings_dict.get('CONN_HEALTH_CHECKS', False),
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # a reused connection skips the setup made by the parent class
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool.release(self.connection)
@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        from backend.postgresql_pool.base import close_pools
+
+        # idle pooled connections to the test database would block DROP DATABASE
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,86 @@
+import threading
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+
+class ConnectionPool:
+    """
+    Thread safe pool holding at most `max_size` connections, idle and checked out together.
+    `acquire()` waits up to `timeout` seconds for a free slot. After `close()` released
+    connections are disconnected instead of kept
+    """
+
+    def __init__(self, max_size, timeout=5.0, health_checks=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_checks = health_checks
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def acquire(self, connect):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(f'connection pool exhausted ({self.max_size} connections in use)')
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return connect()
+                if self._is_usable(connection):
+                    return connection
+                self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        try:
+            status = TRANSACTION_STATUS_UNKNOWN if connection.closed else connection.info.transaction_status
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                self._discard(connection)
+                return
+            if status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(connection)
+                    return
+            self._discard(connection)
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+        for connection in idle:
+            self._discard(connection)
+
+    def _is_usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -24,7 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# On by default for the development server, gunicorn.conf.py turns it off for SERVER_MODE=wsgi|asgi
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ["*"]
 
@@ -44,11 +45,14 @@ INSTALLED_APPS = [
     ]
 
 MIDDLEWARE = [
+    'app.middleware.QueryMetricsMiddleware',
+    'app.middleware.ConcurrencyLimitMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.middleware.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,9 +91,60 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRESQL_PASSWORD'),
         'HOST': os.getenv('POSTGRESQL_HOST'),
         'PORT': os.getenv('POSTGRESQL_PORT'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+# In-process pool of Postgres connections. Connections are handed back to the pool
+# at the end of every request, so CONN_MAX_AGE is not used with it
+
+if os.getenv('DB_POOL_ENABLED', 'False') == 'True':
+    DATABASES['default'].update({
+        'ENGINE': 'backend.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL_MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    })
+
+# Read replicas of the primary database as a comma separated list of `host[:port]`,
+# or of database files with SQLite. Reads of list and detail views go to the replicas,
+# a user who wrote stays on the primary for REPLICA_STICKY_SECONDS
+
+for number, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    if 'sqlite3' in (DATABASES['default']['ENGINE'] or ''):
+        replica_options = {'NAME': replica}
+    else:
+        replica_host, _, replica_port = replica.partition(':')
+        replica_options = {'HOST': replica_host, 'PORT': replica_port or DATABASES['default']['PORT']}
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], **replica_options, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['app.routers.ReplicaRouter']
+
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -135,7 +190,177 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'app.authentication.CachedBasicAuthentication',
+        'app.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ]
 }
+
+# Availability check of the upstream service made before creating books
+
+UPSTREAM_HEALTH = {
+    'BACKEND': os.getenv('UPSTREAM_HEALTH_BACKEND', 'app.health.UpstreamHealth'),
+    'OPTIONS': {
+        'url': os.getenv('UPSTREAM_HEALTH_URL', 'https://www.onliner.by'),
+        'timeout': float(os.getenv('UPSTREAM_HEALTH_TIMEOUT', 2)),
+        'ttl': float(os.getenv('UPSTREAM_HEALTH_TTL', 30)),
+        'failure_threshold': int(os.getenv('UPSTREAM_HEALTH_FAILURE_THRESHOLD', 3)),
+        'reset_timeout': float(os.getenv('UPSTREAM_HEALTH_RESET_TIMEOUT', 60)),
+    },
+}
+
+# Keyset pagination of the book list
+
+BOOKS_PAGE_SIZE = int(os.getenv('BOOKS_PAGE_SIZE', 100))
+
+BOOKS_MAX_PAGE_SIZE = int(os.getenv('BOOKS_MAX_PAGE_SIZE', 1000))
+
+# Books fetched by their ids in one request of /api/v1/books/batch/
+
+BOOKS_BATCH_MAX_SIZE = int(os.getenv('BOOKS_BATCH_MAX_SIZE', 100))
+
+# Changes read in one request of the book change feed at /api/v1/books/changes/
+
+BOOK_CHANGES_PAGE_SIZE = int(os.getenv('BOOK_CHANGES_PAGE_SIZE', 500))
+
+BOOK_CHANGES_MAX_PAGE_SIZE = int(os.getenv('BOOK_CHANGES_MAX_PAGE_SIZE', 5000))
+
+# Bulk creation of books
+
+BOOKS_BULK_BATCH_SIZE = int(os.getenv('BOOKS_BULK_BATCH_SIZE', 500))
+
+BOOKS_BULK_MAX_ITEMS = int(os.getenv('BOOKS_BULK_MAX_ITEMS', 10000))
+
+# Streaming export of books and users
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# Cached representation of the own user profile
+
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', 300))
+
+# Full-text search of books
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'simple')
+
+BOOKS_SEARCH_LIMIT = int(os.getenv('BOOKS_SEARCH_LIMIT', 50))
+
+# SQL query metrics per view, exposed at /metrics/. Set METRICS_TOKEN to require
+# `Authorization: Bearer <token>` from the scraper
+
+QUERY_METRICS_ENABLED = os.getenv('QUERY_METRICS_ENABLED', 'False') == 'True'
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Time verified Basic auth credentials are remembered for
+
+BASIC_AUTH_CACHE_TIMEOUT = int(os.getenv('BASIC_AUTH_CACHE_TIMEOUT', 60))
+
+# Lifetime in seconds of the signed tokens issued at /auth/api/v1/token/
+
+ACCESS_TOKEN_LIFETIME = int(os.getenv('ACCESS_TOKEN_LIFETIME', 300))
+
+REFRESH_TOKEN_LIFETIME = int(os.getenv('REFRESH_TOKEN_LIFETIME', 86400))
+
+# Sliding window rate limits per throttle scope of the views, `user` limits apply to authenticated
+# users and `ip` limits to client addresses. Windows are kept in Redis when RATE_LIMIT_REDIS_URL
+# is set and in the memory of every process otherwise
+
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', REDIS_URL)
+
+RATE_LIMITS = {
+    'register': {
+        'ip': os.getenv('RATE_LIMIT_REGISTER_IP', '20/hour'),
+    },
+    'book_create': {
+        'user': os.getenv('RATE_LIMIT_BOOK_CREATE_USER', '60/minute'),
+        'ip': os.getenv('RATE_LIMIT_BOOK_CREATE_IP', '300/minute'),
+    },
+    # a batch writes up to BOOKS_BULK_MAX_ITEMS books, so batches get their own stricter limits
+    'book_bulk_create': {
+        'user': os.getenv('RATE_LIMIT_BOOK_BULK_CREATE_USER', '10/minute'),
+        'ip': os.getenv('RATE_LIMIT_BOOK_BULK_CREATE_IP', '30/minute'),
+    },
+}
+
+# Requests served at the same time by one process, 0 disables the limit. Requests waiting
+# longer than CONCURRENCY_QUEUE_TIMEOUT seconds for a slot are answered with 503
+
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', 0))
+
+CONCURRENCY_QUEUE_TIMEOUT = float(os.getenv('CONCURRENCY_QUEUE_TIMEOUT', 0.5))
+
+CONCURRENCY_LIMIT_EXEMPT_PATHS = ['/metrics/']
+
+# Background jobs queued in a Redis list and run by `manage.py run_worker`.
+# Without Redis or with JOBS_EAGER jobs run right away in the request
+
+JOBS_REDIS_URL = os.getenv('JOBS_REDIS_URL', REDIS_URL)
+
+JOBS_EAGER = os.getenv('JOBS_EAGER', str(not JOBS_REDIS_URL)) == 'True'
+
+JOBS_QUEUE = os.getenv('JOBS_QUEUE', 'jobs')
+
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 3))
+
+# Failed jobs are retried after JOBS_RETRY_DELAY seconds, doubled for every further attempt.
+# Jobs taken by a worker without a heartbeat for JOBS_WORKER_TIMEOUT seconds are queued again
+
+JOBS_RETRY_DELAY = float(os.getenv('JOBS_RETRY_DELAY', 10))
+
+JOBS_WORKER_TIMEOUT = int(os.getenv('JOBS_WORKER_TIMEOUT', 60))
+
+# Finished jobs are kept for JOBS_RETENTION seconds to report their status,
+# then deleted by the workers or by `manage.py prune_jobs`
+
+JOBS_RETENTION = int(os.getenv('JOBS_RETENTION', 7 * 24 * 60 * 60))
+
+# Emails sent by the background jobs
+
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@mentoring.local')
+
+# Authors leaderboard returned by /api/v1/users/leaderboard/
+
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 10))
+
+LEADERBOARD_MAX_SIZE = int(os.getenv('LEADERBOARD_MAX_SIZE', 100))
+
+# SQL queries are logged to the console with DB_QUERY_LOGGING=True. Django logs
+# and remembers the queries only when DEBUG is on, so both are off in production
+
+DB_QUERY_LOGGING = os.getenv('DB_QUERY_LOGGING', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django.db.backends': {
+            'level': 'DEBUG' if DB_QUERY_LOGGING else 'INFO',
+            'handlers': ['console'],
+            'propagate': False,
+        },
+    },
+}
+
+# Server-Sent Events of created, updated and deleted books at /api/v1/events/books/, served by
+# the ASGI application only (SERVER_MODE=asgi). Events go through Redis pub/sub when
+# BOOK_EVENTS_REDIS_URL is set and reach the clients of the same process otherwise
+
+BOOK_EVENTS_REDIS_URL = os.getenv('BOOK_EVENTS_REDIS_URL', REDIS_URL)
+
+BOOK_EVENTS_CHANNEL = os.getenv('BOOK_EVENTS_CHANNEL', 'book-events')
+
+BOOK_EVENTS_QUEUE_SIZE = int(os.getenv('BOOK_EVENTS_QUEUE_SIZE', 100))
+
+BOOK_EVENTS_HEARTBEAT = float(os.getenv('BOOK_EVENTS_HEARTBEAT', 15))
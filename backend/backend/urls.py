@@ -15,7 +15,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
-from app.views import Login, Logout
+from app.views import Login, Logout, TokenObtainApiView, TokenRefreshApiView, metrics
 
 
 app_name = 'app'
@@ -29,4 +29,7 @@ urlpatterns = [
     path('auth/', include('rest_framework.urls')),
     path('auth/api/v1/login/', Login.as_view(template_name='app/login.html')),
     path('auth/api/v1/logout/', Logout.as_view(next_page='auth/api/login/')),
+    path('auth/api/v1/token/', TokenObtainApiView.as_view(), name='token'),
+    path('auth/api/v1/token/refresh/', TokenRefreshApiView.as_view(), name='token-refresh'),
+    path('metrics/', metrics, name='metrics'),
 ]
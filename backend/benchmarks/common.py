@@ -0,0 +1,123 @@
+"""
+Helpers shared by the benchmarks.
+Benchmarks run from the `backend` directory against a throwaway test database
+created from the configured one, e.g. `python -m benchmarks.conn_pool`
+"""
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    with contextlib.ExitStack() as stack:
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # threads sharing the cache of an in-memory database fail with "database table is locked"
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmarks.sqlite3')
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+@contextlib.contextmanager
+def live_server(threaded=False):
+    """
+    Serves the project with Django's WSGI server on a free local port.
+    The single threaded server keeps database connections between requests like a sync worker does
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, WSGIServer
+    from django.db import connections
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    class JoiningWSGIServer(ThreadedWSGIServer):
+        # server_close() waits for the request threads, which close their database connections
+        daemon_threads = False
+
+    server_class = JoiningWSGIServer if threaded else WSGIServer
+    server = server_class(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+    server.set_app(WSGIHandler())
+
+    def serve():
+        try:
+            server.serve_forever(poll_interval=0.05)
+        finally:
+            # connections kept by CONN_MAX_AGE or the pool would block dropping the test database
+            connections.close_all()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def session_cookies(user):
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    return {name: morsel.value for name, morsel in client.cookies.items()}
+
+
+def seed_books(users, books_per_user):
+    from app.models import Book, User
+
+    authors = User.objects.bulk_create(
+        User(username=f'author{index}', email=f'author{index}@example.com') for index in range(users)
+    )
+    Book.objects.bulk_create(
+        (
+            Book(title=f'Book {author.id}-{index}', short_description='Description ' * 10, author=author)
+            for author in authors
+            for index in range(books_per_user)
+        ),
+        batch_size=1000,
+    )
+    return authors
+
+
+def timed(function, repeat):
+    """
+    Calls `function` `repeat` times and returns the latency of every call in seconds
+    """
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def write_json(data, output=None):
+    text = json.dumps(data, indent=2)
+    if output is None:
+        sys.stdout.write(text + '\n')
+        return
+    with open(output, 'w') as file:
+        file.write(text + '\n')
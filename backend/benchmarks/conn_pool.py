@@ -0,0 +1,80 @@
+"""
+Requests per second of the book list view with different database connection handling:
+
+    per-request  a new connection for every request (CONN_MAX_AGE=0)
+    persistent   connections kept open between requests (CONN_MAX_AGE)
+    pool         in-process connection pool (DB_POOL_ENABLED), Postgres only
+
+Every mode runs in its own process because the settings are read from env vars.
+Usage: python -m benchmarks.conn_pool [--requests 500] [--books 1000] [--output result.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import setup_django, test_database, live_server, seed_books, session_cookies, timed, write_json
+
+MODES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_ENABLED': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '600', 'DB_POOL_ENABLED': 'False'},
+    'pool': {'DB_POOL_ENABLED': 'True'},
+}
+
+
+def run_mode(mode, requests_count, books):
+    import requests
+
+    setup_django()
+    with test_database():
+        authors = seed_books(users=10, books_per_user=books // 10)
+        with live_server() as url, requests.Session() as session:
+            session.cookies.update(session_cookies(authors[0]))
+            books_url = f'{url}/api/v1/books/?page_size=50'
+
+            def get_books():
+                response = session.get(books_url)
+                response.raise_for_status()
+
+            timed(get_books, 20)
+            latencies = timed(get_books, requests_count)
+    return {
+        'mode': mode,
+        'requests': requests_count,
+        'rps': round(len(latencies) / sum(latencies), 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=MODES.keys(), help='Run a single mode in this process')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    if args.mode:
+        write_json(run_mode(args.mode, args.requests, args.books), args.output)
+        return
+
+    results = []
+    for mode, env in MODES.items():
+        if mode == 'pool' and 'postgresql' not in os.getenv('ENGINE', ''):
+            results.append({'mode': mode, 'skipped': 'the connection pool needs Postgres'})
+            continue
+        process = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.conn_pool', '--mode', mode,
+             '--requests', str(args.requests), '--books', str(args.books)],
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(process.stdout))
+    write_json(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
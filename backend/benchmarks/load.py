@@ -0,0 +1,267 @@
+"""
+Load test of the API endpoints.
+Seeds users and books with the test factories, drives every API endpoint (reads, writes, exports
+and tokens, sync and async) from concurrent clients and reports latency percentiles, requests per second and SQL queries per request
+(with a cold and a warm cache) as JSON, so runs can be compared.
+
+Requests run in-process through the Django test client, or against a local threaded
+WSGI server with --live.
+Usage: python -m benchmarks.load [--users 20] [--books 500] [--requests 200] [--concurrency 8]
+                                 [--endpoint books-list ...] [--live] [--output result.json]
+"""
+import argparse
+import contextlib
+import itertools
+import statistics
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django, test_database, live_server, session_cookies, write_json
+
+Endpoint = namedtuple('Endpoint', ('name', 'method', 'path', 'data'))
+
+PASSWORD = 'load-password'
+
+
+def build_endpoints(book_ids, author):
+    """
+    Every API endpoint, except the jobs of background tasks
+    and the long-lived stream of book events
+    """
+    from app.authentication import issue_tokens
+
+    own_book_ids = list(author.books.order_by('id').values_list('id', flat=True))
+    refresh_token = issue_tokens(author)['refresh']
+    # usernames stay unique across the timed run and the query count
+    serial = itertools.count()
+
+    def book_path(prefix, ids=book_ids):
+        return lambda index: f'{prefix}{ids[index % len(ids)]}/'
+
+    def new_book(index):
+        return {'title': f'Load {index}', 'short_description': 'Created by the load test', 'author': author.id}
+
+    def new_books(index):
+        return [new_book(index * 10 + number) for number in range(10)]
+
+    def changed_book(index):
+        return {'title': f'Updated {index}'}
+
+    def new_user(index):
+        username = f'load{next(serial)}'
+        return {'username': username, 'email': f'{username}@example.com', 'password': PASSWORD}
+
+    def batch_path(index):
+        ids = ','.join(str(book_ids[(index + number) % len(book_ids)]) for number in range(20))
+        return f'/api/v1/books/batch/?ids={ids}'
+
+    return [
+        Endpoint('books-list', 'get', lambda index: '/api/v1/books/?page_size=50', None),
+        Endpoint('async-books-list', 'get', lambda index: '/api/v1/async/books/?page_size=50', None),
+        Endpoint('book', 'get', book_path('/api/v1/books/'), None),
+        Endpoint('async-book', 'get', book_path('/api/v1/async/books/'), None),
+        Endpoint('books-batch', 'get', batch_path, None),
+        Endpoint('books-search', 'get', lambda index: '/api/v1/books/search/?q=book', None),
+        Endpoint('books-changes', 'get', lambda index: '/api/v1/books/changes/', None),
+        Endpoint('books-export', 'get', lambda index: '/api/v1/books/export/ndjson/', None),
+        Endpoint('own', 'get', lambda index: '/api/v1/users/own/', None),
+        Endpoint('async-own', 'get', lambda index: '/api/v1/async/users/own/', None),
+        Endpoint('own-cache-stats', 'get', lambda index: '/api/v1/users/own/cache_stats/', None),
+        Endpoint('users-leaderboard', 'get', lambda index: '/api/v1/users/leaderboard/', None),
+        Endpoint('users-export', 'get', lambda index: '/api/v1/users/export/csv/', None),
+        Endpoint('create-book', 'post', lambda index: '/api/v1/books/create_book/', new_book),
+        Endpoint('books-bulk', 'post', lambda index: '/api/v1/books/bulk/', new_books),
+        Endpoint('update-book', 'put', book_path('/api/v1/books/', own_book_ids), changed_book),
+        Endpoint('async-update-book', 'put', book_path('/api/v1/async/books/', own_book_ids), changed_book),
+        Endpoint('create-user', 'post', lambda index: '/api/v1/users/create_user/', new_user),
+        Endpoint(
+            'token', 'post', lambda index: '/auth/api/v1/token/',
+            lambda index: {'username': author.username, 'password': PASSWORD},
+        ),
+        Endpoint(
+            'token-refresh', 'post', lambda index: '/auth/api/v1/token/refresh/',
+            lambda index: {'refresh': refresh_token},
+        ),
+    ]
+
+
+def seed(users, books):
+    from tests.factories import UserFactory, BookFactory
+
+    authors = [UserFactory(username=f'author{index}', email=f'author{index}@example.com') for index in range(users)]
+    # the factory stores the password as it is, the token endpoint needs a hash.
+    # The clients act as a staff author, so the admin endpoints are measured too
+    authors[0].set_password(PASSWORD)
+    authors[0].is_staff = True
+    authors[0].save(update_fields=['password', 'is_staff'])
+    book_ids = [
+        BookFactory(title=f'Book {index}', short_description='Load test book', author=authors[index % users]).id
+        for index in range(books)
+    ]
+    return authors, book_ids
+
+
+def percentile(latencies, value):
+    return statistics.quantiles(latencies, n=100, method='inclusive')[value - 1]
+
+
+class InProcessClient:
+    """
+    One Django test client per thread, authenticated as the given user
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.local = threading.local()
+
+    def request(self, method, path, data):
+        from rest_framework.test import APIClient
+
+        if not hasattr(self.local, 'client'):
+            self.local.client = APIClient()
+            self.local.client.force_authenticate(self.user)
+        return getattr(self.local.client, method)(path, data, format='json').status_code
+
+    def close(self):
+        from django.db import connections
+
+        # the requests of the thread kept its database connections open
+        connections.close_all()
+
+
+class LiveClient:
+    """
+    One requests session per thread sharing the session cookie of the given user
+    """
+
+    def __init__(self, url, user):
+        self.url = url
+        self.cookies = session_cookies(user)
+        self.local = threading.local()
+
+    def request(self, method, path, data):
+        import requests
+
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+            self.local.session.cookies.update(self.cookies)
+            # the login page sets the CSRF cookie required by session authentication
+            self.local.session.get(f'{self.url}/auth/api/v1/login/')
+        headers = {'X-CSRFToken': self.local.session.cookies.get('csrftoken', '')}
+        response = self.local.session.request(method, f'{self.url}{path}', json=data, headers=headers)
+        return response.status_code
+
+    def close(self):
+        # ends the keep-alive connection, the server thread serving it closes its database connections
+        if hasattr(self.local, 'session'):
+            self.local.session.close()
+            del self.local.session
+
+
+def count_queries(endpoint, user):
+    """
+    Returns SQL queries made by one request with a cold cache and by the next one
+    """
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    cache.clear()
+    counts = []
+    for _ in range(2):
+        with CaptureQueriesContext(connection) as queries:
+            getattr(client, endpoint.method)(endpoint.path(0), endpoint.data(0) if endpoint.data else None, format='json')
+        counts.append(len(queries))
+    return counts
+
+
+def run_endpoint(endpoint, client, requests_count, concurrency):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(index):
+        nonlocal errors
+        data = endpoint.data(index) if endpoint.data else None
+        started = time.perf_counter()
+        status_code = client.request(endpoint.method, endpoint.path(index), data)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if status_code >= 400:
+                errors += 1
+
+    def close(barrier):
+        # waiting for each other puts one call on every thread of the pool
+        barrier.wait()
+        client.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests_count)))
+        duration = time.perf_counter() - started
+        barrier = threading.Barrier(concurrency)
+        list(executor.map(close, [barrier] * concurrency))
+
+    return {
+        'requests': requests_count,
+        'concurrency': concurrency,
+        'errors': errors,
+        'rps': round(requests_count / duration, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--books', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoint', action='append', help='Run only the given endpoints')
+    parser.add_argument('--live', action='store_true', help='Send requests to a local threaded WSGI server')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+
+    results = {
+        'config': {
+            'users': args.users,
+            'books': args.books,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'live': args.live,
+        },
+        'endpoints': {},
+    }
+    # without rate limits the write endpoints are measured instead of their 429 responses
+    with test_database(), override_settings(
+        UPSTREAM_HEALTH={'BACKEND': 'app.health.AlwaysAvailable'},
+        RATE_LIMITS={},
+    ):
+        authors, book_ids = seed(args.users, args.books)
+        endpoints = [
+            endpoint for endpoint in build_endpoints(book_ids, authors[0])
+            if not args.endpoint or endpoint.name in args.endpoint
+        ]
+        with live_server(threaded=True) if args.live else contextlib.nullcontext() as url:
+            client = LiveClient(url, authors[0]) if args.live else InProcessClient(authors[0])
+            for endpoint in endpoints:
+                result = run_endpoint(endpoint, client, args.requests, args.concurrency)
+                result['queries_cold'], result['queries'] = count_queries(endpoint, authors[0])
+                results['endpoints'][endpoint.name] = result
+        # written before the test database is dropped, so a failing teardown keeps the results
+        write_json(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
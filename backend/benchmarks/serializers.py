@@ -0,0 +1,74 @@
+"""
+Serialization cost of the book list and of the own user profile:
+
+    model    model instances, ModelSerializer and the DRF JSON renderer (the former path)
+    compact  `values()` rows, the compact reader and the orjson renderer when installed
+
+Both paths are checked to produce the same bytes before timing.
+Usage: python -m benchmarks.serializers [--books 1000] [--repeat 50] [--output result.json]
+"""
+import argparse
+import statistics
+
+from benchmarks.common import setup_django, test_database, seed_books, timed, write_json
+
+
+def summary(latencies):
+    return {
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'p95_ms': round(statistics.quantiles(latencies, n=20, method='inclusive')[18] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=1000, help='Books in the list and of the user')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    from app.models import Book, User
+    from app.renderers import FastJSONRenderer, orjson
+    from app.serializers import BOOK_READER, BookSerializer, UserSerializer
+
+    class ModelUserSerializer(UserSerializer):
+        books = serializers.ListSerializer(child=BookSerializer())
+
+    def model_books():
+        books = Book.objects.select_related('author').order_by('id')[:args.books]
+        return JSONRenderer().render({'results': BookSerializer(books, many=True).data})
+
+    def compact_books():
+        rows = BOOK_READER.values(Book.objects.order_by('id'), 'id')[:args.books]
+        return FastJSONRenderer().render({'results': BOOK_READER.to_representation(rows)})
+
+    def model_user():
+        user = User.objects.prefetch_related('books').get(id=author_id)
+        return JSONRenderer().render({'user': ModelUserSerializer(user).data})
+
+    def compact_user():
+        user = User.objects.get(id=author_id)
+        return FastJSONRenderer().render({'user': UserSerializer(user).data})
+
+    results = {'config': {'books': args.books, 'repeat': args.repeat, 'orjson': orjson is not None}}
+    with test_database():
+        author_id = seed_books(users=1, books_per_user=args.books)[0].id
+        for name, model, compact in (('books-list', model_books, compact_books), ('own-user', model_user, compact_user)):
+            if model() != compact():
+                raise SystemExit(f'{name}: the compact output differs from the model output')
+            model_latencies = summary(timed(model, args.repeat))
+            compact_latencies = summary(timed(compact, args.repeat))
+            results[name] = {
+                'model': model_latencies,
+                'compact': compact_latencies,
+                'speedup': round(model_latencies['mean_ms'] / compact_latencies['mean_ms'], 2),
+            }
+    write_json(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
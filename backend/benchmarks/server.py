@@ -0,0 +1,174 @@
+"""
+Startup time and requests per second of the development server against the production servers:
+
+    runserver      `manage.py runserver` with DEBUG on, as started by default
+    gunicorn-wsgi  gunicorn with threaded workers (SERVER_MODE=wsgi)
+    gunicorn-asgi  gunicorn with uvicorn workers (SERVER_MODE=asgi)
+
+Every server is started in its own process on a throwaway database and measured
+from the start of the process to the first answered request. The book list is then
+requested by concurrent clients. With SQLite the database is kept in a temporary file
+so the servers can open it.
+Usage: python -m benchmarks.server [--requests 1000] [--concurrency 8] [--books 1000]
+                                   [--workers 4] [--server gunicorn-wsgi ...] [--output result.json]
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import setup_django, test_database, seed_books, session_cookies, write_json
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'runserver': {
+        'command': [sys.executable, 'manage.py', 'runserver', '--noreload', '127.0.0.1:{port}'],
+        'env': {'DEBUG': 'True'},
+        'requires': [],
+    },
+    'gunicorn-wsgi': {
+        'command': [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        'env': {'DEBUG': 'False', 'SERVER_MODE': 'wsgi'},
+        'requires': ['gunicorn'],
+    },
+    'gunicorn-asgi': {
+        'command': [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        'env': {'DEBUG': 'False', 'SERVER_MODE': 'asgi'},
+        'requires': ['gunicorn', 'uvicorn_worker'],
+    },
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(process, url, timeout=60):
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'The server exited with code {process.returncode}')
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.01)
+    raise RuntimeError(f'The server did not answer in {timeout} seconds')
+
+
+def load(url, cookies, requests_count, concurrency):
+    import requests
+
+    local = threading.local()
+    errors = 0
+    lock = threading.Lock()
+
+    def call(index):
+        nonlocal errors
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+            local.session.cookies.update(cookies)
+        if local.session.get(url).status_code >= 400:
+            with lock:
+                errors += 1
+
+    # connections and workers are warmed up before measuring
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(concurrency * 4)))
+        errors = 0
+        started = time.perf_counter()
+        list(executor.map(call, range(requests_count)))
+        duration = time.perf_counter() - started
+    return round(requests_count / duration, 1), errors
+
+
+def run_server(name, database_env, cookies, args):
+    port = free_port()
+    server = SERVERS[name]
+    env = {
+        **os.environ,
+        **database_env,
+        **server['env'],
+        'PORT': str(port),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'GUNICORN_WORKERS': str(args.workers),
+        'GUNICORN_ACCESS_LOG': '',
+        'UPSTREAM_HEALTH_BACKEND': 'app.health.AlwaysAvailable',
+    }
+    command = [part.format(port=port) for part in server['command']]
+    url = f'http://127.0.0.1:{port}/api/v1/books/?page_size=50'
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(process, url)
+        startup = time.perf_counter() - started
+        rps, errors = load(url, cookies, args.requests, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        'startup_ms': round(startup * 1000, 1),
+        'rps': rps,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1, help='Gunicorn workers')
+    parser.add_argument('--server', action='append', choices=SERVERS.keys(), help='Run only the given servers')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    directory = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+
+    results = {
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'books': args.books,
+            'workers': args.workers,
+        },
+        'servers': {},
+    }
+    try:
+        with test_database():
+            authors = seed_books(users=10, books_per_user=args.books // 10)
+            cookies = session_cookies(authors[0])
+            database_env = {'POSTGRES_NAME': connection.settings_dict['NAME'], 'DB_REPLICAS': ''}
+            for name in args.server or SERVERS:
+                missing = [module for module in SERVERS[name]['requires'] if importlib.util.find_spec(module) is None]
+                if missing:
+                    results['servers'][name] = {'skipped': f'{", ".join(missing)} is not installed'}
+                    continue
+                results['servers'][name] = run_server(name, database_env, cookies, args)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    write_json(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,4 +4,14 @@ sleep 3
 
 
 poetry run python backend/manage.py migrate
-poetry run python backend/manage.py runserver 0.0.0.0:8000
+
+# SERVER_MODE=wsgi or SERVER_MODE=asgi starts gunicorn configured by backend/gunicorn.conf.py,
+# anything else starts the development server
+case "${SERVER_MODE:-runserver}" in
+    wsgi|asgi)
+        exec poetry run gunicorn --config backend/gunicorn.conf.py
+        ;;
+    *)
+        exec poetry run python backend/manage.py runserver 0.0.0.0:8000
+        ;;
+esac
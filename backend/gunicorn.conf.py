@@ -0,0 +1,67 @@
+"""
+Gunicorn settings of the production server started by `entrypoint.sh`
+with SERVER_MODE=wsgi or SERVER_MODE=asgi.
+Every value can be overridden with an env var, e.g. `GUNICORN_WORKERS=4`
+"""
+import multiprocessing
+import os
+
+server_mode = os.getenv('SERVER_MODE', 'wsgi')
+
+# the settings keep DEBUG on for the development server, production turns it off
+# unless DEBUG is set explicitly. This runs before the app is loaded
+os.environ.setdefault('DEBUG', 'False')
+
+bind = os.getenv('GUNICORN_BIND', f'0.0.0.0:{os.getenv("PORT", 8000)}')
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+# WSGI workers serve requests from a pool of threads, so a request waiting on
+# the database or the upstream does not block the whole process. ASGI workers
+# run the async views on an event loop and the sync ones in a thread
+if server_mode == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'backend.wsgi:application'
+    worker_class = 'gthread'
+
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Django is imported once in the master and the workers are forked from it,
+# which makes the start faster and shares the memory of the imported code
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Workers are replaced after serving a number of requests, the jitter keeps them
+# from restarting at the same time
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Should be longer than the idle timeout of the load balancer in front of the server,
+# otherwise it reuses connections which were already closed
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+
+# Heartbeat files of the workers are kept in memory instead of the container overlay
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+errorlog = '-'
+
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # connections opened while preloading the app must not be inherited by the workers
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,5 @@
+#!/bin/sh
+
+sleep 10
+
+poetry run python backend/manage.py run_worker
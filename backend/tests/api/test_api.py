@@ -1,13 +1,12 @@
 import pytest
 
 from app.models import User, Book
-from app.views import BookCreateApiView
+from app.health import UpstreamHealth
 
 from django.forms import model_to_dict
 from django.urls import reverse
 
 from faker import Faker
-from requests import Response
 from rest_framework.test import APIClient
 from unittest.mock import patch, MagicMock
 
@@ -24,6 +23,11 @@ class TestBook:
     update_book_url = '/api/v1/books/'
     book_fields = ['title', 'short_description', 'author']
 
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
     @pytest.mark.django_db
     def test_url(self):
         assert self.create_user_url == reverse('create-user')
@@ -159,38 +163,44 @@ class TestBook:
 
         assert response.status_code == 403
 
-    def test_create_book_incorrect_inner_url(self):
-        view_class = BookCreateApiView()
-        some_response = Response()
-        some_response.status_code = 400
-        view_class.post = MagicMock(some_response=some_response)
-        mock_post_response = Response()
-        mock_post_response.status_code = 200 if view_class.post.some_response.status_code == 200 else 400
-
-        with patch('app.views.BookCreateApiView.post', return_value=mock_post_response) as res:
-            assert res.return_value.status_code == 400
-
-    def test_create_book_incorrect_2_inner_url(self):
-        view_class = BookCreateApiView()
-        some_response = Response()
-        some_response.status_code = 404
-        view_class.post = MagicMock(some_response=some_response)
-        mock_post_response = Response()
-        mock_post_response.status_code = 200 if view_class.post.some_response.status_code == 200 else 400
-
-        with patch('app.views.BookCreateApiView.post', return_value=mock_post_response) as res:
-            assert res.return_value.status_code == 400
-
-    def test_create_book_correct_inner_url(self):
-        view_class = BookCreateApiView()
-        some_response = Response()
-        some_response.status_code = 200
-        view_class.post = MagicMock(some_response=some_response)
-        mock_post_response = Response()
-        mock_post_response.status_code = 200 if view_class.post.some_response.status_code == 200 else 400
-
-        with patch('app.views.BookCreateApiView.post', return_value=mock_post_response) as res:
-            assert res.return_value.status_code == 200
+    def _post_book_with_upstream(self, user_factory, book_factory, health):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        book = book_factory.build(title=fake.name(), author=user)
+        book_data = model_to_dict(
+            book,
+            fields=[field for field in self.book_fields if hasattr(book, field) and getattr(book, field) is not None],
+        )
+        with patch('app.views.upstream_health', return_value=health):
+            return client.post(self.create_book_url, book_data)
+
+    @pytest.mark.django_db
+    def test_create_book_incorrect_inner_url(self, user_factory, book_factory):
+        health = MagicMock()
+        health.is_available.return_value = False
+        response = self._post_book_with_upstream(user_factory, book_factory, health)
+
+        assert response.status_code == 400
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_create_book_incorrect_2_inner_url(self, user_factory, book_factory, upstream_server):
+        upstream_server.status = 404
+        health = UpstreamHealth(upstream_server.url)
+        health.refresh()
+        response = self._post_book_with_upstream(user_factory, book_factory, health)
+
+        assert response.status_code == 400
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_create_book_correct_inner_url(self, user_factory, book_factory, upstream_server):
+        health = UpstreamHealth(upstream_server.url)
+        health.refresh()
+        response = self._post_book_with_upstream(user_factory, book_factory, health)
+
+        assert response.status_code == 201
+        assert upstream_server.hits == 1
 
     @pytest.mark.django_db
     def test_update_book(self, user_factory, book_factory):
@@ -0,0 +1,139 @@
+import pytest
+from faker import Faker
+from rest_framework.test import APIClient
+from unittest.mock import patch, AsyncMock
+
+from app.models import Book, Job
+
+
+fake = Faker()
+client = APIClient()
+
+
+class TestAsyncViews:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+    async_books_url = '/api/v1/async/books/'
+    async_own_user_url = '/api/v1/async/users/own/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def author(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.fixture
+    def books(self, author, book_factory):
+        return [book_factory(title=fake.name()[:50], author=author) for _ in range(7)]
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('query', ['', '&ordering=title', '&ordering=-title', '&mine=true', '&title_prefix=A'])
+    def test_list_matches_sync_view(self, books, query):
+        sync_url = f'{self.books_url}?page_size=3{query}'
+        async_url = f'{self.async_books_url}?page_size=3{query}'
+        while sync_url:
+            sync_response = client.get(sync_url)
+            async_response = client.get(async_url)
+
+            assert async_response.status_code == 200
+            assert async_response.content == sync_response.content.replace(b'/books/', b'/async/books/')
+            sync_url = sync_response.json()['next']
+            async_url = async_response.json()['next']
+        assert async_url is None
+
+    @pytest.mark.django_db
+    def test_list_walk_back(self, books):
+        url = f'{self.async_books_url}?page_size=3'
+        for _ in range(2):
+            url = client.get(url).json()['next']
+        titles = []
+        while url:
+            response = client.get(url).json()
+            titles = [book['title'] for book in response['results']] + titles
+            url = response['previous']
+
+        assert titles == [book.title for book in books]
+
+    @pytest.mark.django_db
+    def test_sync_cursor(self, books):
+        url = client.get(self.books_url, {'page_size': 3, 'ordering': 'title'}).json()['next']
+        response = client.get(url.replace('/books/', '/async/books/'))
+
+        assert response.status_code == 200
+        assert [book['title'] for book in response.json()['results']] == sorted(book.title for book in books)[3:6]
+
+    @pytest.mark.django_db
+    def test_invalid_filter(self, author):
+        response = client.get(self.async_books_url, {'author': 'x'})
+
+        assert response.status_code == 400
+        assert response.json() == client.get(self.books_url, {'author': 'x'}).json()
+
+    @pytest.mark.django_db
+    def test_invalid_cursor(self, books):
+        response = client.get(self.async_books_url, {'cursor': 'broken'})
+
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_not_authenticated(self):
+        assert client.get(self.async_books_url).status_code == 403
+        assert client.get(self.async_own_user_url).status_code == 403
+
+    @pytest.mark.django_db
+    def test_create(self, author):
+        response = client.post(self.async_books_url, {'title': 'Async', 'author': author.id}, format='json')
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data == {'title': 'Async', 'short_description': None, 'author': author.id, 'job': data['job']}
+        assert Book.objects.filter(title='Async', author=author).exists()
+        assert Job.objects.get(id=data['job']).status == Job.DONE
+
+    @pytest.mark.django_db
+    def test_create_without_title(self, author):
+        response = client.post(self.async_books_url, {'author': author.id}, format='json')
+
+        assert response.status_code == 400
+        assert 'title' in response.json()
+
+    @pytest.mark.django_db
+    def test_create_upstream_not_available(self, author):
+        health = AsyncMock()
+        health.ais_available.return_value = False
+        with patch('app.async_views.upstream_health', return_value=health):
+            response = client.post(self.async_books_url, {'title': 'Async', 'author': author.id}, format='json')
+
+        assert response.status_code == 400
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_retrieve_and_update(self, books, user_factory):
+        book_url = f'{self.async_books_url}{books[0].id}/'
+        assert client.get(book_url).json()['title'] == books[0].title
+
+        response = client.put(book_url, {'title': 'Renamed'}, format='json')
+        assert response.status_code == 200
+        assert Book.objects.get(id=books[0].id).title == 'Renamed'
+
+        client.force_authenticate(user_factory(username='alex2', email='alex2@authors.com'))
+        response = client.put(book_url, {'title': 'Stolen'}, format='json')
+        assert response.status_code == 403
+        assert Book.objects.get(id=books[0].id).title == 'Renamed'
+
+    @pytest.mark.django_db
+    def test_retrieve_not_found(self, author):
+        assert client.get(f'{self.async_books_url}100/').status_code == 404
+
+    @pytest.mark.django_db
+    def test_own_user(self, books):
+        response = client.get(self.async_own_user_url)
+
+        assert response.status_code == 200
+        assert response.content == client.get('/api/v1/users/own/').content
+        assert len(response.json()['user']['books']) == len(books)
@@ -0,0 +1,65 @@
+import base64
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from app.models import User
+
+
+client = APIClient()
+
+
+class TestCachedBasicAuthentication:
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.credentials()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='alex', email='alex@authors.com', password='secret')
+
+    def _login(self, username, password):
+        token = base64.b64encode(f'{username}:{password}'.encode()).decode()
+        client.credentials(HTTP_AUTHORIZATION=f'Basic {token}')
+
+    def _get_counting_hashes(self):
+        with patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check_password:
+            response = client.get(self.books_url)
+        return response.status_code, check_password.call_count
+
+    @pytest.mark.django_db
+    def test_repeated_requests_skip_hasher(self, user):
+        self._login('alex', 'secret')
+
+        assert self._get_counting_hashes() == (200, 1)
+        assert self._get_counting_hashes() == (200, 0)
+        assert self._get_counting_hashes() == (200, 0)
+
+    @pytest.mark.django_db
+    def test_wrong_password_is_not_cached(self, user):
+        self._login('alex', 'wrong')
+
+        assert self._get_counting_hashes() == (403, 1)
+        assert self._get_counting_hashes() == (403, 1)
+
+    @pytest.mark.django_db
+    def test_password_change_invalidates(self, user):
+        self._login('alex', 'secret')
+        assert self._get_counting_hashes() == (200, 1)
+
+        user.set_password('changed')
+        user.save()
+        assert self._get_counting_hashes() == (403, 1)
+
+    @pytest.mark.django_db
+    def test_inactive_user(self, user):
+        self._login('alex', 'secret')
+        assert self._get_counting_hashes() == (200, 1)
+
+        user.is_active = False
+        user.save()
+        assert self._get_counting_hashes()[0] == 403
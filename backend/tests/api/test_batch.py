@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+client = APIClient()
+
+
+class TestBookBatch:
+    email = 'alex@authors.com'
+    batch_url = '/api/v1/books/batch/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def author(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.fixture
+    def books(self, author, book_factory):
+        return [book_factory(title=f'Book {index}', author=author) for index in range(5)]
+
+    @pytest.mark.django_db
+    def test_get_in_requested_order(self, books):
+        ids = [books[3].id, books[0].id, 1000, books[2].id, books[0].id]
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'{self.batch_url}?ids={",".join(map(str, ids))}')
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [book['id'] for book in data['results']] == [books[3].id, books[0].id, books[2].id]
+        assert data['results'][0] == {
+            'id': books[3].id,
+            'title': 'Book 3',
+            'short_description': books[3].short_description,
+            'author': books[3].author_id,
+            'version': 1,
+        }
+        assert data['missing'] == [1000]
+        assert len(queries) == 1
+
+    @pytest.mark.django_db
+    def test_post(self, books):
+        response = client.post(self.batch_url, {'ids': [books[1].id, books[4].id]}, format='json')
+
+        assert response.status_code == 200
+        assert [book['title'] for book in response.json()['results']] == ['Book 1', 'Book 4']
+        assert response.json()['missing'] == []
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('query', ['', '?ids=', '?ids=1,a', '?ids=0'])
+    def test_invalid_ids(self, author, query):
+        response = client.get(f'{self.batch_url}{query}')
+
+        assert response.status_code == 400
+        assert 'ids' in response.json()
+
+    @pytest.mark.django_db
+    def test_batch_size_limit(self, author, settings):
+        settings.BOOKS_BATCH_MAX_SIZE = 3
+
+        assert client.post(self.batch_url, {'ids': [1, 2, 3, 3]}, format='json').status_code == 200
+        assert client.post(self.batch_url, {'ids': [1, 2, 3, 4]}, format='json').status_code == 400
+
+    @pytest.mark.django_db
+    def test_unauthenticated(self):
+        assert client.get(f'{self.batch_url}?ids=1').status_code == 401
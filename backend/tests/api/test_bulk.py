@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from faker import Faker
+from rest_framework.test import APIClient
+
+from app.models import Book
+
+
+fake = Faker()
+client = APIClient()
+
+
+class TestBookBulkCreate:
+    email = 'alex@authors.com'
+    bulk_url = '/api/v1/books/bulk/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def author(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    def _books(self, author, count):
+        return [
+            {'title': fake.name()[:50], 'short_description': fake.text(100), 'author': author.id}
+            for _ in range(count)
+        ]
+
+    @pytest.mark.django_db
+    def test_json_array(self, author):
+        response = client.post(self.bulk_url, self._books(author, 5), format='json')
+
+        assert response.status_code == 201
+        assert response.json() == {'created': 5}
+        assert Book.objects.filter(author=author).count() == 5
+
+    @pytest.mark.django_db
+    def test_ndjson(self, author):
+        body = '\n'.join(json.dumps(book) for book in self._books(author, 3)) + '\n'
+        response = client.post(self.bulk_url, body, content_type='application/x-ndjson')
+
+        assert response.status_code == 201
+        assert Book.objects.count() == 3
+
+    @pytest.mark.django_db
+    def test_ndjson_parse_error(self, author):
+        response = client.post(self.bulk_url, '{"title": "a"}\n{oops\n', content_type='application/x-ndjson')
+
+        assert response.status_code == 400
+        assert 'line 2' in response.json()['detail']
+
+    @pytest.mark.django_db
+    def test_per_item_errors(self, author):
+        books = self._books(author, 4)
+        books[1]['title'] = ''
+        books[3]['author'] = author.id + 100
+        response = client.post(self.bulk_url, books, format='json')
+
+        assert response.status_code == 400
+        errors = response.json()['errors']
+        assert [error['index'] for error in errors] == [1, 3]
+        assert 'title' in errors[0]['errors']
+        assert errors[1]['errors'] == {'author': [f'Invalid pk "{author.id + 100}" - object does not exist.']}
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_unknown_author(self, author):
+        books = self._books(author, 3)
+        books[2]['author'] = author.id + 100
+        response = client.post(self.bulk_url, books, format='json')
+
+        assert response.status_code == 400
+        assert response.json()['errors'] == [
+            {'index': 2, 'errors': {'author': [f'Invalid pk "{author.id + 100}" - object does not exist.']}},
+        ]
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_batched_inserts(self, author, settings):
+        settings.BOOKS_BULK_BATCH_SIZE = 10
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(self.bulk_url, self._books(author, 25), format='json')
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "app_book"')]
+
+        assert response.status_code == 201
+        assert len(inserts) == 3
+
+    @pytest.mark.django_db
+    def test_too_many_items(self, author, settings):
+        settings.BOOKS_BULK_MAX_ITEMS = 2
+        response = client.post(self.bulk_url, self._books(author, 3), format='json')
+
+        assert response.status_code == 400
+        assert not Book.objects.exists()
+
+    @pytest.mark.django_db
+    def test_empty(self, author):
+        response = client.post(self.bulk_url, [], format='json')
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_not_authenticated(self):
+        response = client.post(self.bulk_url, [], format='json')
+
+        assert response.status_code == 403
@@ -0,0 +1,132 @@
+import pytest
+from django.core import signing
+from django.core.management import call_command
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from app.changes import SYNC_TOKEN_SALT, START, changes_since, decode_sync_token, encode_sync_token
+from app.models import BookChange
+
+
+client = APIClient()
+
+
+# Postgres serves only changes of finished transactions, the tests commit their writes
+class TestBookChanges:
+    email = 'alex@authors.com'
+    changes_url = '/api/v1/books/changes/'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def author(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.fixture
+    def books(self, author, book_factory):
+        return [book_factory(title=f'Book {index}', author=author) for index in range(3)]
+
+    def _sync(self, token=None, **params):
+        if token is not None:
+            params['since'] = token
+        response = client.get(self.changes_url, params)
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_initial_sync(self, books):
+        data = self._sync()
+
+        assert [book['id'] for book in data['updated']] == [book.id for book in books]
+        assert data['updated'][0]['title'] == 'Book 0'
+        assert data['deleted'] == []
+        assert data['has_more'] is False
+        assert self._sync(data['sync_token'])['updated'] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changes_since_token(self, books):
+        token = self._sync()['sync_token']
+        client.put(f'{self.books_url}{books[1].id}/', {'title': 'Renamed'}, format='json')
+        client.put(f'{self.books_url}{books[1].id}/', {'title': 'Renamed again'}, format='json')
+        deleted_id = books[2].id
+        books[2].delete()
+
+        data = self._sync(token)
+        assert [(book['id'], book['title']) for book in data['updated']] == [(books[1].id, 'Renamed again')]
+        assert data['deleted'] == [deleted_id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages(self, books, book_factory):
+        first = self._sync(page_size=2)
+        assert len(first['updated']) == 2
+        assert first['has_more'] is True
+
+        second = self._sync(first['sync_token'], page_size=2)
+        assert [book['id'] for book in second['updated']] == [books[2].id]
+        assert second['has_more'] is False
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_created_books(self, author):
+        token = self._sync()['sync_token']
+        bulk = [{'title': f'Bulk {index}', 'author': author.id} for index in range(2)]
+        assert client.post(f'{self.books_url}bulk/', bulk, format='json').status_code == 201
+
+        assert [book['title'] for book in self._sync(token)['updated']] == ['Bulk 0', 'Bulk 1']
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('params', [{'since': 'invalid'}, {'page_size': 0}])
+    def test_invalid_params(self, author, params):
+        assert client.get(self.changes_url, params).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sequence_token_invalid(self, author):
+        # tokens of the id-only feed have to start over
+        assert client.get(self.changes_url, {'since': signing.dumps(3, salt=SYNC_TOKEN_SALT)}).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_transaction_order(self, books):
+        # a change committed later with a lower id still follows the cursor of its transaction
+        first, second = BookChange.objects.filter(book_id__in=[books[0].id, books[1].id]).order_by('id')
+        BookChange.objects.filter(pk=first.pk).update(txid=first.txid + 2)
+        BookChange.objects.filter(pk=second.pk).update(txid=first.txid + 1)
+        BookChange.objects.exclude(pk__in=[first.pk, second.pk]).delete()
+
+        page = changes_since(START, 1)
+        assert [book.id for book in page.books] == [books[1].id]
+        assert [book.id for book in changes_since(page.cursor, 1).books] == [books[0].id]
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='SQLite runs one writing transaction at a time')
+    @pytest.mark.django_db(transaction=True)
+    def test_running_transaction_withheld(self, books, book_factory):
+        token = self._sync()['sync_token']
+        with transaction.atomic():
+            book = book_factory(title='Pending', author=books[0].author)
+            assert changes_since(decode_sync_token(token), 10).books == []
+
+        assert [book['id'] for book in self._sync(token)['updated']] == [book.id]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_compact(self, books):
+        token = self._sync()['sync_token']
+        deleted_id = books[0].id
+        books[0].save()
+        books[0].delete()
+
+        call_command('compact_book_changes')
+        assert list(BookChange.objects.order_by('id').values_list('book_id', 'deleted')) == [
+            (books[1].id, False),
+            (books[2].id, False),
+            (deleted_id, True),
+        ]
+        assert self._sync(token)['deleted'] == [deleted_id]
+
+
+def test_sync_token():
+    assert decode_sync_token(encode_sync_token((5, 7))) == (5, 7)
+    assert decode_sync_token(signing.dumps([5, 'x'], salt=SYNC_TOKEN_SALT)) is None
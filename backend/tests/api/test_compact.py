@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app.models import Book
+from app.renderers import FastJSONRenderer
+from app.serializers import BookSerializer, UserSerializer
+
+
+client = APIClient()
+
+TITLES = ['plain', 'Война и мир', 'quote " and \\ slash /', 'line\u2028separator\u2029', 'tab\tnew\nline\x1f']
+
+
+class ModelUserSerializer(UserSerializer):
+    books = serializers.ListSerializer(child=BookSerializer())
+
+
+class TestCompactReadPath:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+    own_user_url = '/api/v1/users/own/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        for title in TITLES:
+            book_factory(title=title, short_description=f'About {title}', author=user)
+        book_factory(title='no description', short_description=None, author=user)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.mark.django_db
+    def test_book_list_bytes(self, user):
+        response = client.get(self.books_url)
+        books = BookSerializer(Book.objects.order_by('id'), many=True).data
+
+        assert response.content == JSONRenderer().render({'next': None, 'previous': None, 'results': books})
+
+    @pytest.mark.django_db
+    def test_book_list_pages(self, user):
+        response = client.get(self.books_url, {'page_size': 2})
+        books = BookSerializer(Book.objects.order_by('id')[:2], many=True).data
+
+        assert response.json()['results'] == books
+        assert client.get(response.json()['next']).json()['results'] == BookSerializer(
+            Book.objects.order_by('id')[2:4], many=True,
+        ).data
+
+    @pytest.mark.django_db
+    def test_own_user_bytes(self, user):
+        response = client.get(self.own_user_url)
+        user.refresh_from_db()
+
+        assert response.content == JSONRenderer().render({'user': ModelUserSerializer(user).data})
+
+
+class TestFastJSONRenderer:
+
+    @pytest.mark.parametrize('data', [
+        {'results': [{'title': title, 'author': 1, 'short_description': None} for title in TITLES]},
+        {'flag': True, 'empty': [], 'nested': {'list': [1, -2, 10 ** 12]}},
+        [],
+    ])
+    def test_renderer_bytes(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_renderer_falls_back(self):
+        data = {'big': 2 ** 70}
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        assert FastJSONRenderer().render(data, 'application/json; indent=2') == JSONRenderer().render(
+            data, 'application/json; indent=2',
+        )
+        with patch('app.renderers.orjson', None):
+            assert FastJSONRenderer().render({'title': TITLES[3]}) == JSONRenderer().render({'title': TITLES[3]})
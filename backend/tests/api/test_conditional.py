@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+client = APIClient()
+
+
+class TestConditionalGet:
+    email = 'alex@authors.com'
+    own_user_url = '/api/v1/users/own/'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.fixture
+    def book(self, user, book_factory):
+        return book_factory(title='first', author=user)
+
+    @pytest.mark.django_db
+    def test_book_not_modified(self, book):
+        response = client.get(f'{self.books_url}{book.id}/')
+        assert response.status_code == 200
+        assert response.has_header('Last-Modified')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'{self.books_url}{book.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+        assert response.content == b''
+        assert len(queries) == 1
+
+    @pytest.mark.django_db
+    def test_book_modified(self, book):
+        etag = client.get(f'{self.books_url}{book.id}/')['ETag']
+        assert client.put(f'{self.books_url}{book.id}/', {'title': 'renamed'}, format='json').status_code == 200
+
+        response = client.get(f'{self.books_url}{book.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['title'] == 'renamed'
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db
+    def test_book_if_modified_since(self, book):
+        last_modified = client.get(f'{self.books_url}{book.id}/')['Last-Modified']
+
+        response = client.get(f'{self.books_url}{book.id}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    @pytest.mark.django_db
+    def test_missing_book(self, user):
+        response = client.get(f'{self.books_url}0/', HTTP_IF_NONE_MATCH='"etag"')
+
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_profile_not_modified(self, book):
+        etag = client.get(self.own_user_url)['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.own_user_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert len(queries) == 0
+
+    @pytest.mark.django_db
+    def test_profile_changes(self, user, book, book_factory, django_capture_on_commit_callbacks):
+        etag = client.get(self.own_user_url)['ETag']
+
+        def refetch():
+            nonlocal etag
+            response = client.get(self.own_user_url, HTTP_IF_NONE_MATCH=etag)
+            etag = response['ETag']
+            return response.status_code
+
+        book.title = 'renamed'
+        with django_capture_on_commit_callbacks(execute=True):
+            book.save()
+        assert refetch() == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second = book_factory(title='second', author=user)
+        assert refetch() == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            second.delete()
+        assert refetch() == 200
+
+        user.first_name = 'Alex'
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+        assert refetch() == 200
+        assert refetch() == 304
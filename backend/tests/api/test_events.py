@@ -0,0 +1,155 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from app.authentication import issue_tokens
+from app.event_stream import BOOK_EVENTS_PATH
+from app.events import event_broker
+from app.models import User
+from backend.asgi import application
+
+
+client = APIClient()
+
+
+class TestBookEventsPublishing:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def broker(self):
+        broker = MagicMock()
+        with patch('app.events.event_broker', return_value=broker):
+            yield broker
+
+    def _published(self, broker):
+        return [event for call in broker.publish.call_args_list for event in call.args[0]]
+
+    @pytest.mark.django_db
+    def test_create_update_delete(self, user_factory, broker, django_capture_on_commit_callbacks):
+        author = user_factory(email=self.email)
+        client.force_authenticate(author)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                f'{self.books_url}create_book/', {'title': 'Dune', 'author': author.id}, format='json',
+            )
+        book_id = User.objects.get(id=author.id).books.get().id
+        with django_capture_on_commit_callbacks(execute=True):
+            client.put(f'{self.books_url}{book_id}/', {'title': 'Dune Messiah'}, format='json')
+        with django_capture_on_commit_callbacks(execute=True):
+            author.books.get().delete()
+
+        assert response.status_code == 201
+        assert self._published(broker) == [
+            {'type': 'created', 'id': book_id, 'title': 'Dune', 'author': author.id, 'version': 1},
+            {'type': 'updated', 'id': book_id, 'title': 'Dune Messiah', 'author': author.id, 'version': 2},
+            {'type': 'deleted', 'id': book_id, 'author': author.id},
+        ]
+
+    @pytest.mark.django_db
+    def test_not_published_before_commit(self, user_factory, book_factory, broker, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            book_factory(author=user_factory(email=self.email))
+
+        assert not broker.publish.called
+        for callback in callbacks:
+            callback()
+        assert broker.publish.call_count == 1
+
+    @pytest.mark.django_db
+    def test_bulk_create(self, user_factory, broker, django_capture_on_commit_callbacks):
+        author = user_factory(email=self.email)
+        client.force_authenticate(author)
+        books = [{'title': f'Bulk {index}', 'author': author.id} for index in range(3)]
+        with django_capture_on_commit_callbacks(execute=True):
+            assert client.post(f'{self.books_url}bulk/', books, format='json').status_code == 201
+
+        assert broker.publish.call_count == 1
+        assert [event['title'] for event in self._published(broker)] == ['Bulk 0', 'Bulk 1', 'Bulk 2']
+
+
+class TestBookEventStream:
+
+    @staticmethod
+    def _headers(user_id=1):
+        token = issue_tokens(User(pk=user_id))['access']
+        return [(b'authorization', f'Bearer {token}'.encode())]
+
+    @staticmethod
+    def _stream(headers, events=(), method='GET'):
+        async def run():
+            received = asyncio.Queue()
+            sent = []
+            scope = {
+                'type': 'http',
+                'method': method,
+                'path': BOOK_EVENTS_PATH,
+                'query_string': b'',
+                'headers': headers,
+            }
+
+            async def send(message):
+                sent.append(message)
+
+            task = asyncio.ensure_future(application(scope, received.get, send))
+            for _ in range(100):
+                if event_broker().subscribers or task.done():
+                    break
+                await asyncio.sleep(0.01)
+            event_broker().publish(events)
+            await asyncio.sleep(0.05)
+            await received.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 1)
+            return sent
+
+        sent = asyncio.run(run())
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        return sent[0]['status'], dict(sent[0]['headers']), body
+
+    def test_events(self):
+        events = [{'type': 'created', 'id': 1}, {'type': 'deleted', 'id': 2}]
+        status_code, headers, body = self._stream(self._headers(), events)
+
+        assert status_code == 200
+        assert headers[b'content-type'] == b'text/event-stream'
+        assert body == b'retry: 3000\n\n' + b''.join(f'data: {json.dumps(event)}\n\n'.encode() for event in events)
+        assert event_broker().subscribers == 0
+
+    def test_heartbeat(self, settings):
+        settings.BOOK_EVENTS_HEARTBEAT = 0.01
+        status_code, headers, body = self._stream(self._headers())
+
+        assert status_code == 200
+        assert b': keep-alive\n\n' in body
+
+    def test_slow_client_disconnected(self, settings):
+        settings.BOOK_EVENTS_QUEUE_SIZE = 2
+        events = [{'type': 'created', 'id': book_id} for book_id in range(5)]
+        status_code, headers, body = self._stream(self._headers(), events)
+
+        assert status_code == 200
+        assert body.count(b'data: ') == 2
+
+    @pytest.mark.parametrize('headers, status_code', [
+        ([], 403),
+        ([(b'authorization', b'Bearer invalid')], 401),
+    ])
+    def test_not_authenticated(self, headers, status_code):
+        assert self._stream(headers)[0] == status_code
+
+    def test_method_not_allowed(self):
+        assert self._stream(self._headers(), method='POST')[0] == 405
+
+    def test_connections_closed(self):
+        with patch('app.event_stream.close_old_connections') as close_old_connections:
+            assert self._stream(self._headers())[0] == 200
+
+        assert close_old_connections.call_count == 2
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from faker import Faker
+from rest_framework.test import APIClient
+
+from app.models import Book
+
+
+fake = Faker()
+client = APIClient()
+
+
+class TestExport:
+    email = 'alex@authors.com'
+    books_export_url = '/api/v1/books/export/'
+    users_export_url = '/api/v1/users/export/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def books(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return [book_factory(title=fake.name()[:50], short_description='Ünïcode, "quoted"', author=user) for _ in range(5)]
+
+    @pytest.mark.django_db
+    def test_books_ndjson(self, books, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        response = client.get(f'{self.books_export_url}ndjson/')
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert rows == [
+            {'id': book.id, 'title': book.title, 'short_description': book.short_description, 'author_id': book.author_id}
+            for book in books
+        ]
+
+    @pytest.mark.django_db
+    def test_books_csv(self, books):
+        response = client.get(f'{self.books_export_url}csv/')
+
+        assert response.status_code == 200
+        assert 'books.csv' in response['Content-Disposition']
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert rows[0] == ['id', 'title', 'short_description', 'author_id']
+        assert [row[1] for row in rows[1:]] == [book.title for book in books]
+        assert rows[1][2] == 'Ünïcode, "quoted"'
+
+    @pytest.mark.django_db
+    def test_unknown_format(self, books):
+        response = client.get(f'{self.books_export_url}xml/')
+
+        assert response.status_code == 404
+
+    @pytest.mark.django_db
+    def test_users_only_for_admin(self, books, user_factory):
+        response = client.get(f'{self.users_export_url}ndjson/')
+        assert response.status_code == 403
+
+        admin = user_factory(username='admin', email='admin@authors.com', is_staff=True)
+        client.force_authenticate(admin)
+        response = client.get(f'{self.users_export_url}ndjson/')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        assert response.status_code == 200
+        assert [row['username'] for row in rows] == ['alex', 'admin']
+        assert 'password' not in rows[0]
+
+    @pytest.mark.django_db
+    def test_command(self, books, tmp_path):
+        stdout = io.StringIO()
+        call_command('export_data', 'books', '--chunk-size', '2', stdout=stdout)
+        assert len(stdout.getvalue().splitlines()) == Book.objects.count()
+
+        output = tmp_path / 'users.csv'
+        call_command('export_data', 'users', '--format', 'csv', '--output', str(output))
+        assert output.read_text().splitlines()[1].split(',')[1] == 'alex'
@@ -0,0 +1,87 @@
+import pytest
+from rest_framework.test import APIClient
+
+from app.filters import next_prefix
+
+
+client = APIClient()
+
+
+class TestBookListFilters:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def users(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        other = user_factory(username='other', email='other@authors.com')
+        for title, author in (
+                ('Dune', user), ('Dune Messiah', other), ('Duck', user), ('Emma', other), ('Dun', other), ('dune', user),
+        ):
+            book_factory(title=title, author=author)
+        client.force_authenticate(user)
+        return user, other
+
+    def _titles(self, **params):
+        response = client.get(self.books_url, params)
+        assert response.status_code == 200
+        return [book['title'] for book in response.json()['results']]
+
+    @pytest.mark.django_db
+    def test_author(self, users):
+        assert self._titles(author=users[1].id) == ['Dune Messiah', 'Emma', 'Dun']
+
+    @pytest.mark.django_db
+    def test_mine(self, users):
+        assert self._titles(mine='true') == ['Dune', 'Duck', 'dune']
+        assert self._titles(mine='false') == ['Dune', 'Dune Messiah', 'Duck', 'Emma', 'Dun', 'dune']
+
+    @pytest.mark.django_db
+    def test_title_prefix(self, users):
+        assert self._titles(title_prefix='Dun') == ['Dune', 'Dune Messiah', 'Dun']
+        assert self._titles(title_prefix='Dune', author=users[1].id) == ['Dune Messiah']
+        assert self._titles(title_prefix='Z') == []
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('prefix', ['\U0010ffff', 'Dun\U0010ffff', '\ud7ff'])
+    def test_title_prefix_last_code_points(self, users, prefix):
+        assert self._titles(title_prefix=prefix) == []
+
+    @pytest.mark.django_db
+    def test_ordering(self, users):
+        assert self._titles(ordering='title') == ['Duck', 'Dun', 'Dune', 'Dune Messiah', 'Emma', 'dune']
+        assert self._titles(ordering='-title', mine='true') == ['dune', 'Dune', 'Duck']
+        assert self._titles(ordering='-id') == ['dune', 'Dun', 'Emma', 'Duck', 'Dune Messiah', 'Dune']
+        # not whitelisted, the default order is kept
+        assert self._titles(ordering='short_description') == ['Dune', 'Dune Messiah', 'Duck', 'Emma', 'Dun', 'dune']
+
+    @pytest.mark.django_db
+    def test_ordered_pages(self, users):
+        response = client.get(self.books_url, {'ordering': 'title', 'page_size': 4})
+        titles = [book['title'] for book in response.json()['results']]
+        titles += [book['title'] for book in client.get(response.json()['next']).json()['results']]
+
+        assert titles == ['Duck', 'Dun', 'Dune', 'Dune Messiah', 'Emma', 'dune']
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('params', [{'author': 'alex'}, {'author': 0}, {'mine': 'maybe'}])
+    def test_invalid(self, users, params):
+        response = client.get(self.books_url, params)
+
+        assert response.status_code == 400
+        assert list(response.json()) == list(params)
+
+
+@pytest.mark.parametrize('prefix, expected', [
+    ('Dun', 'Duo'),
+    ('Dun\U0010ffff', 'Duo'),
+    ('\U0010ffff\U0010ffff', None),
+    ('\ud7ff', '\ue000'),
+])
+def test_next_prefix(prefix, expected):
+    assert next_prefix(prefix) == expected
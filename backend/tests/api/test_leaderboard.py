@@ -0,0 +1,49 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+client = APIClient()
+
+
+class TestAuthorLeaderboard:
+    leaderboard_url = '/api/v1/users/leaderboard/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def authors(self, user_factory, book_factory):
+        authors = [user_factory(username=f'author{index}', email=f'author{index}@authors.com') for index in range(4)]
+        for author, books in zip(authors, (2, 3, 0, 1)):
+            for _ in range(books):
+                book_factory(author=author)
+        client.force_authenticate(authors[0])
+        return authors
+
+    def _usernames(self, **params):
+        return [author['username'] for author in client.get(self.leaderboard_url, params).json()]
+
+    @pytest.mark.django_db
+    def test_by_books_count(self, authors):
+        response = client.get(self.leaderboard_url)
+
+        assert response.status_code == 200
+        assert [(author['username'], author['books_count']) for author in response.json()] == [
+            ('author1', 3), ('author0', 2), ('author3', 1),
+        ]
+        assert self._usernames(limit=2) == ['author1', 'author0']
+
+    @pytest.mark.django_db
+    def test_by_last_book(self, authors):
+        assert self._usernames(order_by='last_book_at') == ['author3', 'author1', 'author0']
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('params', [{'order_by': 'age'}, {'limit': 0}, {'limit': 1000}, {'limit': 'all'}])
+    def test_invalid_params(self, authors, params):
+        assert client.get(self.leaderboard_url, params).status_code == 400
+
+    @pytest.mark.django_db
+    def test_not_authenticated(self):
+        assert client.get(self.leaderboard_url).status_code == 401
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from app.metrics import QueryRecorder, fingerprint, query_metrics
+from app.models import Book
+
+
+class TestQueryMetrics:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+    metrics_url = '/metrics/'
+
+    @pytest.fixture(autouse=True)
+    def enabled(self, settings):
+        settings.QUERY_METRICS_ENABLED = True
+        query_metrics.reset()
+        yield
+        query_metrics.reset()
+
+    @pytest.fixture
+    def client(self, user_factory):
+        client = APIClient()
+        client.force_authenticate(user_factory(email=self.email))
+        return client
+
+    @pytest.mark.django_db
+    def test_server_timing_header(self, client):
+        response = client.get(self.books_url)
+
+        assert response.status_code == 200
+        assert response['Server-Timing'].startswith('db;dur=')
+        assert 'desc="1 queries"' in response['Server-Timing']
+
+    @pytest.mark.django_db
+    def test_metrics_endpoint(self, client):
+        client.get(self.books_url)
+        client.get(self.books_url)
+        body = client.get(self.metrics_url).content.decode()
+
+        assert 'app_http_requests_total{view="books-all"} 2' in body
+        assert 'app_db_queries_total{view="books-all"} 2' in body
+        assert 'app_db_query_seconds_total{view="books-all"}' in body
+        assert 'app_profile_cache_hits_total 0' in body
+
+    @pytest.mark.django_db
+    def test_duplicate_queries(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        books = [book_factory(title=str(index), author=user) for index in range(3)]
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for book in books:
+                Book.objects.filter(id=book.id).first()
+            Book.objects.filter(id__in=[book.id for book in books]).count()
+
+        assert recorder.count == 4
+        assert list(recorder.duplicates.values()) == [3]
+
+        query_metrics.record('books', recorder)
+        body = query_metrics.render()
+        key = next(iter(recorder.duplicates))
+        assert f'app_db_duplicate_queries_total{{view="books",fingerprint="{key}"}} 2' in body
+        assert f'app_db_query_fingerprint_info{{fingerprint="{key}"' in body
+
+    def test_fingerprint_ignores_values(self):
+        assert fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)') == fingerprint('SELECT 2 FROM t WHERE id IN (%s)')
+        assert fingerprint("SELECT * FROM t WHERE a = 'x'") != fingerprint('SELECT * FROM u WHERE a = %s')
+
+    @pytest.mark.django_db
+    def test_metrics_token(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+
+        assert client.get(self.metrics_url).status_code == 401
+        assert client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer secret').status_code == 200
+
+    @pytest.mark.django_db
+    def test_disabled(self, settings):
+        settings.QUERY_METRICS_ENABLED = False
+        client = APIClient()
+
+        assert not client.get(self.books_url).has_header('Server-Timing')
+        assert client.get(self.metrics_url).status_code == 404
@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from faker import Faker
+from rest_framework.test import APIClient
+
+from app.models import Book
+from app.pagination import BookCursorPagination
+
+
+fake = Faker()
+client = APIClient()
+
+
+class TestBookPagination:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    def _create_books(self, user_factory, book_factory, count):
+        user = user_factory(email=self.email)
+        for _ in range(count):
+            book_factory(title=fake.name()[:50], author=user)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.mark.django_db
+    def test_first_page(self, user_factory, book_factory):
+        self._create_books(user_factory, book_factory, 5)
+        response = client.get(self.books_url, {'page_size': 2})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body['results']) == 2
+        assert body['previous'] is None
+        assert body['next'] is not None
+
+    @pytest.mark.django_db
+    def test_walk_all_pages(self, user_factory, book_factory):
+        self._create_books(user_factory, book_factory, 7)
+        titles = []
+        url = f'{self.books_url}?page_size=3'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            titles.extend(book['title'] for book in response.json()['results'])
+            url = response.json()['next']
+
+        assert titles == list(Book.objects.order_by('id').values_list('title', flat=True))
+
+    @pytest.mark.django_db
+    def test_deep_page_query_count(self, user_factory, book_factory):
+        self._create_books(user_factory, book_factory, 9)
+        first_page = client.get(self.books_url, {'page_size': 3})
+        with CaptureQueriesContext(connection) as first_queries:
+            client.get(first_page.json()['next'])
+        url = first_page.json()['next']
+        url = client.get(url).json()['next']
+        with CaptureQueriesContext(connection) as deep_queries:
+            client.get(url)
+
+        assert len(first_queries) == len(deep_queries)
+        assert 'OFFSET' not in deep_queries.captured_queries[-1]['sql']
+
+    @pytest.mark.django_db
+    def test_max_page_size(self, user_factory, book_factory, monkeypatch):
+        monkeypatch.setattr(BookCursorPagination, 'max_page_size', 3)
+        self._create_books(user_factory, book_factory, 5)
+        response = client.get(self.books_url, {'page_size': 3 + 2})
+
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 3
+        assert response.json()['next'] is not None
@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.cache import profile_cache_stats
+from app.models import Book
+
+
+client = APIClient()
+
+
+class TestProfileCache:
+    email = 'alex@authors.com'
+    own_user_url = '/api/v1/users/own/'
+    bulk_url = '/api/v1/books/bulk/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    def _titles(self):
+        return [book['title'] for book in client.get(self.own_user_url).json()['user']['books']]
+
+    @pytest.mark.django_db
+    def test_cached_read_skips_database(self, user, book_factory):
+        book_factory(title='first', author=user)
+        first = client.get(self.own_user_url)
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(self.own_user_url)
+
+        assert first.json() == second.json()
+        assert len(queries) == 0
+        assert profile_cache_stats() == {'hits': 1, 'misses': 1}
+
+    @pytest.mark.django_db
+    def test_book_save_invalidates(self, user, book_factory, django_capture_on_commit_callbacks):
+        book = book_factory(title='first', author=user)
+        assert self._titles() == ['first']
+
+        book.title = 'renamed'
+        with django_capture_on_commit_callbacks(execute=True):
+            book.save()
+        assert self._titles() == ['renamed']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            book_factory(title='second', author=user)
+        assert self._titles() == ['renamed', 'second']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            book.delete()
+        assert self._titles() == ['second']
+
+    @pytest.mark.django_db
+    def test_invalidated_after_commit(self, user, book_factory, django_capture_on_commit_callbacks):
+        book = book_factory(title='first', author=user)
+        assert self._titles() == ['first']
+
+        book.title = 'renamed'
+        with django_capture_on_commit_callbacks() as callbacks:
+            book.save()
+            # readers see the committed profile until the transaction commits
+            assert self._titles() == ['first']
+        for callback in callbacks:
+            callback()
+        assert self._titles() == ['renamed']
+
+    @pytest.mark.django_db
+    def test_author_change_invalidates_both(self, user, user_factory, book_factory, django_capture_on_commit_callbacks):
+        other = user_factory(username='alex2', email='alex2@authors.com')
+        book_factory(title='first', author=user)
+        assert self._titles() == ['first']
+
+        book = Book.objects.get()
+        book.author = other
+        with django_capture_on_commit_callbacks(execute=True):
+            book.save()
+        assert self._titles() == []
+
+    @pytest.mark.django_db
+    def test_user_save_invalidates(self, user, django_capture_on_commit_callbacks):
+        assert client.get(self.own_user_url).json()['user']['first_name'] == ''
+
+        user.first_name = 'Alex'
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+        assert client.get(self.own_user_url).json()['user']['first_name'] == 'Alex'
+
+    @pytest.mark.django_db
+    def test_bulk_create_invalidates(self, user, django_capture_on_commit_callbacks):
+        assert self._titles() == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(self.bulk_url, [{'title': 'bulk', 'author': user.id}], format='json')
+        assert self._titles() == ['bulk']
+
+    @pytest.mark.django_db
+    def test_stats_only_for_admin(self, user, user_factory):
+        client.get(self.own_user_url)
+        assert client.get('/api/v1/users/own/cache_stats/').status_code == 403
+
+        client.force_authenticate(user_factory(username='admin', email='admin@authors.com', is_staff=True))
+        response = client.get('/api/v1/users/own/cache_stats/')
+        assert response.status_code == 200
+        assert response.json() == {'hits': 0, 'misses': 1}
@@ -0,0 +1,84 @@
+import pytest
+from rest_framework.test import APIClient
+
+from app.search import search_vector_stale
+
+
+client = APIClient()
+
+
+class TestBookSearch:
+    email = 'alex@authors.com'
+    search_url = '/api/v1/books/search/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def books(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return [
+            book_factory(title='Dune', short_description='Desert planet and spice', author=user),
+            book_factory(title='Solaris', short_description='An ocean planet', author=user),
+            book_factory(title='Planet of the apes', short_description='Apes rule', author=user),
+        ]
+
+    def _titles(self, query):
+        response = client.get(self.search_url, {'q': query})
+        assert response.status_code == 200
+        return [book['title'] for book in response.json()]
+
+    @pytest.mark.django_db
+    def test_title_matches_rank_first(self, books):
+        titles = self._titles('planet')
+
+        assert titles[0] == 'Planet of the apes'
+        assert sorted(titles[1:]) == ['Dune', 'Solaris']
+
+    @pytest.mark.django_db
+    def test_all_words_must_match(self, books):
+        assert self._titles('ocean planet') == ['Solaris']
+
+    @pytest.mark.django_db
+    def test_no_match(self, books):
+        assert self._titles('dragon') == []
+
+    @pytest.mark.django_db
+    def test_empty_query(self, books):
+        assert self._titles('') == []
+
+    @pytest.mark.django_db
+    def test_updated_book_is_found(self, books):
+        book = books[0]
+        book.title = 'Dragon'
+        book.save()
+
+        assert self._titles('dragon') == ['Dragon']
+
+    @pytest.mark.django_db
+    def test_book_updated_through_api_is_found(self, books):
+        response = client.put(f'/api/v1/books/{books[1].id}/', {'short_description': 'Sentient sea'}, format='json')
+
+        assert response.status_code == 200
+        assert self._titles('sentient') == ['Solaris']
+        assert self._titles('solaris') == ['Solaris']
+        assert self._titles('ocean') == []
+
+    @pytest.mark.django_db
+    def test_limit(self, books, settings):
+        settings.BOOKS_SEARCH_LIMIT = 1
+
+        assert len(self._titles('planet')) == 1
+
+
+@pytest.mark.parametrize('update_fields, stale', [
+    (None, True),
+    (frozenset({'title', 'updated_at'}), True),
+    (frozenset({'title', 'search_vector'}), False),
+    (frozenset({'author', 'updated_at'}), False),
+])
+def test_search_vector_stale(update_fields, stale):
+    assert search_vector_stale(update_fields) is stale
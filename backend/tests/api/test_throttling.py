@@ -0,0 +1,151 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from app.middleware import ConcurrencyLimitMiddleware
+from app.throttling import LocalWindowStore, parse_rate
+
+
+client = APIClient()
+
+
+class TestRateLimits:
+    email = 'alex@authors.com'
+    register_url = '/api/v1/users/create_user/'
+    books_url = '/api/v1/books/'
+    create_book_url = '/api/v1/books/create_book/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    def _register(self, index, **extra):
+        data = {'username': f'reader{index}', 'email': f'reader{index}@authors.com', 'password': 'secret'}
+        return client.post(self.register_url, data, format='json', **extra)
+
+    def _create_book(self, user, url=None):
+        return client.post(url or self.create_book_url, {'title': 'Book', 'author': user.id}, format='json')
+
+    @pytest.mark.django_db
+    def test_registration_per_ip(self, settings):
+        settings.RATE_LIMITS = {'register': {'ip': '2/minute'}}
+
+        assert [self._register(index).status_code for index in range(3)] == [201, 201, 429]
+        assert self._register(3, REMOTE_ADDR='10.0.0.2').status_code == 201
+
+    @pytest.mark.django_db
+    def test_retry_after(self, settings):
+        settings.RATE_LIMITS = {'register': {'ip': '1/hour'}}
+        self._register(0)
+
+        response = self._register(1)
+        assert response.status_code == 429
+        assert 3500 < int(response['Retry-After']) <= 3600
+
+    @pytest.mark.django_db
+    def test_book_create_per_user(self, settings, user, user_factory):
+        settings.RATE_LIMITS = {'book_create': {'user': '2/minute', 'ip': '10/minute'}}
+
+        assert [self._create_book(user).status_code for _ in range(3)] == [201, 201, 429]
+        assert client.get(self.books_url).status_code == 200
+
+        other = user_factory(username='other', email='other@authors.com')
+        client.force_authenticate(other)
+        assert self._create_book(other).status_code == 201
+
+    @pytest.mark.django_db
+    def test_book_create_per_ip(self, settings, user, user_factory):
+        settings.RATE_LIMITS = {'book_create': {'user': '10/minute', 'ip': '2/minute'}}
+        self._create_book(user)
+        self._create_book(user)
+
+        other = user_factory(username='other', email='other@authors.com')
+        client.force_authenticate(other)
+        assert self._create_book(other).status_code == 429
+
+    @pytest.mark.django_db
+    def test_bulk_create_per_user(self, settings, user):
+        settings.RATE_LIMITS = {'book_bulk_create': {'user': '2/minute'}}
+        books = [{'title': f'Bulk {index}', 'author': user.id} for index in range(3)]
+
+        assert [
+            client.post(f'{self.books_url}bulk/', books, format='json').status_code for _ in range(3)
+        ] == [201, 201, 429]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_book_create(self, settings, user):
+        settings.RATE_LIMITS = {'book_create': {'user': '1/minute'}}
+
+        assert self._create_book(user, '/api/v1/async/books/').status_code == 201
+        response = self._create_book(user, '/api/v1/async/books/')
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+
+
+class TestLocalWindowStore:
+
+    @pytest.mark.parametrize('rate, expected', [('10/minute', (10, 60)), ('5/s', (5, 1)), ('100/day', (100, 86400))])
+    def test_parse_rate(self, rate, expected):
+        assert parse_rate(rate) == expected
+
+    def test_window_slides(self):
+        store = LocalWindowStore()
+        with patch('app.throttling.time.monotonic') as monotonic:
+            monotonic.return_value = 100.0
+            assert store.hit('key', 2, 10) == (True, 0.0)
+            monotonic.return_value = 105.0
+            assert store.hit('key', 2, 10) == (True, 0.0)
+            assert store.hit('key', 2, 10) == (False, 5.0)
+
+            monotonic.return_value = 110.0
+            assert store.hit('key', 2, 10) == (True, 0.0)
+            assert store.hit('key', 2, 10) == (False, 5.0)
+            assert store.hit('other', 2, 10) == (True, 0.0)
+
+
+class TestConcurrencyLimit:
+
+    def test_sheds_load(self, rf, settings):
+        settings.MAX_CONCURRENT_REQUESTS = 1
+        settings.CONCURRENCY_QUEUE_TIMEOUT = 0.01
+        started, release = threading.Event(), threading.Event()
+
+        def slow_view(request):
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        middleware = ConcurrencyLimitMiddleware(slow_view)
+        thread = threading.Thread(target=middleware, args=(rf.get('/api/v1/books/'),))
+        thread.start()
+        started.wait(5)
+
+        response = middleware(rf.get('/api/v1/books/'))
+        assert response.status_code == 503
+        assert response['Retry-After'] == '1'
+
+        release.set()
+        thread.join()
+        assert middleware(rf.get('/api/v1/books/')) == 'done'
+
+    def test_exempt_paths(self, rf, settings):
+        settings.MAX_CONCURRENT_REQUESTS = 1
+        settings.CONCURRENCY_QUEUE_TIMEOUT = 0.01
+
+        def view(request):
+            if request.path == '/metrics/':
+                return 'metrics'
+            # the only slot is taken by this request
+            return middleware(rf.get('/metrics/'))
+
+        middleware = ConcurrencyLimitMiddleware(view)
+        assert middleware(rf.get('/api/v1/books/')) == 'metrics'
@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.models import User
+
+
+client = APIClient()
+
+
+class TestSignedTokenAuthentication:
+    token_url = '/auth/api/v1/token/'
+    refresh_url = '/auth/api/v1/token/refresh/'
+    own_user_url = '/api/v1/users/own/'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.credentials()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(username='alex', email='alex@authors.com', password='secret')
+
+    @pytest.fixture
+    def tokens(self, user):
+        response = client.post(self.token_url, {'username': 'alex', 'password': 'secret'}, format='json')
+        assert response.status_code == 200
+        return response.json()
+
+    def _use(self, token):
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @pytest.mark.django_db
+    def test_wrong_password(self, user):
+        response = client.post(self.token_url, {'username': 'alex', 'password': 'wrong'}, format='json')
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_authenticates_without_queries(self, user, tokens):
+        self._use(tokens['access'])
+        assert client.get(self.own_user_url).json()['user']['username'] == 'alex'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.own_user_url)
+        assert response.status_code == 200
+        assert len(queries) == 0
+
+    @pytest.mark.django_db
+    def test_user_loaded_when_needed(self, user, user_factory, book_factory, tokens):
+        book = book_factory(author=user)
+        other = book_factory(author=user_factory(username='other', email='other@authors.com'))
+        self._use(tokens['access'])
+
+        assert client.put(f'{self.books_url}{book.id}/', {'title': 'Renamed'}, format='json').status_code == 200
+        assert client.put(f'{self.books_url}{other.id}/', {'title': 'Renamed'}, format='json').status_code == 403
+        assert client.get('/api/v1/users/own/cache_stats/').status_code == 403
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('token', ['invalid', None])
+    def test_invalid_token(self, tokens, token):
+        self._use(token or tokens['refresh'])
+
+        assert client.get(self.books_url).status_code == 403
+
+    @pytest.mark.django_db
+    def test_expired_token(self, tokens, settings):
+        settings.ACCESS_TOKEN_LIFETIME = -1
+        self._use(tokens['access'])
+
+        assert client.get(self.books_url).status_code == 403
+
+    @pytest.mark.django_db
+    def test_refresh(self, tokens):
+        response = client.post(self.refresh_url, {'refresh': tokens['refresh']}, format='json')
+        assert response.status_code == 200
+
+        self._use(response.json()['access'])
+        assert client.get(self.books_url).status_code == 200
+
+    @pytest.mark.django_db
+    def test_refresh_rejects_access_token(self, tokens):
+        response = client.post(self.refresh_url, {'refresh': tokens['access']}, format='json')
+
+        assert response.status_code == 400
+
+    @pytest.mark.django_db
+    def test_password_change_revokes_refresh(self, user, tokens):
+        user.set_password('changed')
+        user.save()
+
+        response = client.post(self.refresh_url, {'refresh': tokens['refresh']}, format='json')
+        assert response.status_code == 400
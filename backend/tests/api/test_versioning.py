@@ -0,0 +1,119 @@
+from unittest.mock import MagicMock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.models import Book, User
+from app.versioning import VersionConflict, supports_update_returning, update_book
+
+
+client = APIClient()
+
+
+class TestVersionedUpdate:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+    async_books_url = '/api/v1/async/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def author(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.fixture
+    def book(self, author, book_factory):
+        return book_factory(title='first', author=author)
+
+    @pytest.mark.django_db
+    def test_update_without_reads(self, book):
+        # the conditional UPDATE, which also reindexes the book on Postgres, and the entry of the change feed,
+        # in a savepoint of the test transaction
+        with CaptureQueriesContext(connection) as queries:
+            response = client.put(f'{self.books_url}{book.id}/', {'title': 'renamed'}, format='json')
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'title': 'renamed',
+            'short_description': book.short_description,
+            'author': book.author_id,
+            'version': 2,
+        }
+        assert len([query for query in queries if 'SAVEPOINT' not in query['sql']]) == 2
+        book.refresh_from_db()
+        assert (book.title, book.version) == ('renamed', 2)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('books_url', [books_url, async_books_url])
+    def test_version_conflict(self, book, books_url):
+        assert client.get(f'{books_url}{book.id}/').json()['version'] == 1
+        response = client.put(f'{books_url}{book.id}/', {'title': 'second', 'version': 1}, format='json')
+        assert response.status_code == 200
+        assert response.json()['version'] == 2
+
+        response = client.put(f'{books_url}{book.id}/', {'title': 'lost', 'version': 1}, format='json')
+        assert response.status_code == 409
+        assert response.json()['version'] == 2
+        assert Book.objects.get(id=book.id).title == 'second'
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('method', ['put', 'patch'])
+    def test_not_author(self, book, user_factory, method):
+        client.force_authenticate(user_factory(username='alex2', email='alex2@authors.com'))
+        response = getattr(client, method)(f'{self.books_url}{book.id}/', {'title': 'stolen'}, format='json')
+
+        assert response.status_code == 403
+        assert Book.objects.get(id=book.id).version == 1
+
+    @pytest.mark.django_db
+    def test_not_found(self, author):
+        assert client.put(f'{self.books_url}100/', {'title': 'missing'}, format='json').status_code == 404
+
+    @pytest.mark.django_db
+    def test_invalid_version(self, book):
+        response = client.put(f'{self.books_url}{book.id}/', {'version': 0}, format='json')
+
+        assert response.status_code == 400
+        assert 'version' in response.json()
+
+    @pytest.mark.django_db
+    def test_author_change_updates_counters(self, book, user_factory):
+        other = user_factory(username='alex2', email='alex2@authors.com')
+        response = client.put(f'{self.books_url}{book.id}/', {'author': other.id}, format='json')
+
+        assert response.status_code == 200
+        assert User.objects.get(id=book.author_id).books_count == 0
+        assert User.objects.get(id=other.id).books_count == 1
+
+    @pytest.mark.django_db
+    def test_update_book(self, book):
+        updated = update_book(book.id, book.author_id, {'short_description': 'new'}, version=1)
+        assert (updated.short_description, updated.version) == ('new', 2)
+
+        with pytest.raises(VersionConflict) as conflict:
+            update_book(book.id, book.author_id, {'short_description': 'old'}, version=1)
+        assert conflict.value.version == 2
+
+    @pytest.mark.django_db
+    def test_version_only(self, book):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.put(f'{self.books_url}{book.id}/', {'version': 1}, format='json')
+
+        assert response.status_code == 200
+        assert response.json()['version'] == 1
+        # only read, so no change is recorded and no receiver treats it as a full save
+        assert len(queries) == 1
+        assert queries[0]['sql'].startswith('SELECT')
+        assert client.put(f'{self.books_url}{book.id}/', {'version': 2}, format='json').status_code == 409
+
+
+@pytest.mark.parametrize('vendor, expected', [('postgresql', True), ('mysql', False), ('oracle', False)])
+def test_update_returning_support(vendor, expected):
+    assert supports_update_returning(MagicMock(vendor=vendor)) is expected
@@ -1,6 +1,77 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.cache import cache
 from pytest_factoryboy import register
 
 from .factories import UserFactory, BookFactory
 
 register(UserFactory)
 register(BookFactory)
+
+
+class UpstreamStub:
+    """
+    State of the local HTTP server standing in for the upstream service
+    """
+
+    def __init__(self):
+        self.status = 200
+        self.delay = 0
+        self.hits = 0
+        self.url = None
+
+
+@pytest.fixture(autouse=True)
+def no_upstream_calls(settings):
+    settings.UPSTREAM_HEALTH = {'BACKEND': 'app.health.AlwaysAvailable'}
+
+
+@pytest.fixture(autouse=True)
+def no_replicas(settings):
+    # tests reading from the replicas enable them and all databases
+    settings.DATABASE_REPLICAS = []
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(settings):
+    settings.RATE_LIMITS = {}
+    settings.RATE_LIMIT_REDIS_URL = None
+
+
+@pytest.fixture(autouse=True)
+def local_events(settings):
+    settings.BOOK_EVENTS_REDIS_URL = None
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def upstream_server():
+    stub = UpstreamStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            stub.hits += 1
+            time.sleep(stub.delay)
+            self.send_response(stub.status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.handle_error = lambda *args: None
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    stub.url = f'http://127.0.0.1:{server.server_port}/'
+    yield stub
+    server.shutdown()
+    server.server_close()
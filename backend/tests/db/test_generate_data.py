@@ -0,0 +1,70 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from app.counters import stale_counters
+from app.management.commands.generate_data import TEXT, CopyStream
+from app.models import Book, BookChange, User
+
+
+class TestGenerateData:
+
+    @pytest.mark.django_db
+    def test_fixed_distribution(self, capsys):
+        call_command(
+            'generate_data', '--users', '20', '--distribution', 'fixed', '--books-per-author', '3',
+            '--description-length', '5:10', '--password', 'secret', '--seed', '1', '--batch-size', '7',
+        )
+
+        assert 'Created 20 users and 60 books' in capsys.readouterr().out
+        assert User.objects.filter(username__startswith='generated').count() == 20
+        assert set(User.objects.values_list('books_count', flat=True)) == {3}
+        assert not stale_counters().exists()
+        assert BookChange.objects.count() == Book.objects.count() == 60
+        assert all(5 <= len(description) <= 10 for description in Book.objects.values_list(
+            'short_description', flat=True,
+        ))
+        assert User.objects.get(username='generated0').check_password('secret')
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('length', [len(TEXT), len(TEXT) + 1, 3 * len(TEXT)])
+    def test_description_longer_than_text(self, length):
+        call_command(
+            'generate_data', '--users', '1', '--distribution', 'fixed', '--books-per-author', '1',
+            '--description-length', str(length), '--seed', '1',
+        )
+
+        assert len(Book.objects.get().short_description) == length
+
+    @pytest.mark.django_db
+    def test_pareto_distribution(self):
+        call_command('generate_data', '--users', '200', '--max-books-per-author', '50', '--seed', '1')
+
+        counts = list(User.objects.values_list('books_count', flat=True))
+        assert max(counts) <= 50
+        assert sum(counts) == Book.objects.count()
+        assert not stale_counters().exists()
+
+    @pytest.mark.django_db
+    def test_existing_prefix(self, user_factory):
+        user_factory(username='generated0', email='alex@authors.com')
+
+        with pytest.raises(CommandError):
+            call_command('generate_data', '--users', '1')
+        assert User.objects.count() == 1
+
+    @pytest.mark.parametrize('value', ['10:5', 'x', '-1:5'])
+    def test_invalid_description_length(self, value):
+        with pytest.raises(CommandError):
+            call_command('generate_data', '--description-length', value)
+
+
+class TestCopyStream:
+
+    def test_read(self):
+        rows = [('a,b', None, True, 1), ('c', 'd', False, 2)] * 3
+        stream = CopyStream(rows, chunk_rows=2)
+
+        chunks = iter(lambda: stream.read(5), b'')
+        assert b''.join(chunks) == b'"a,b",\\N,t,1\nc,d,f,2\n' * 3
+        assert stream.read() == b''
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+client = APIClient()
+
+
+def query_plan(sql):
+    """
+    Plan of the query with fresh statistics, Postgres is told to prefer indexes like it does on a full table
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('ANALYZE app_book')
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute(f'EXPLAIN {sql}')
+                rows = cursor.fetchall()
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            rows = cursor.fetchall()
+        return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+class TestBookListIndexes:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory, book_factory):
+        user = user_factory(email=self.email)
+        other = user_factory(username='other', email='sam@authors.com')
+        for index in range(5):
+            book_factory(title=f'Book {index}', author=user)
+        for index in range(40):
+            book_factory(title=f'Other {index}', author=other)
+        client.force_authenticate(user)
+        return user
+
+    def _list_sql(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(self.books_url, params).status_code == 200
+        return next(query['sql'] for query in queries if 'FROM "app_book"' in query['sql'])
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('params, index', [
+        ({'author': 1}, 'book_author_id_idx'),
+        ({'mine': 'true', 'ordering': '-id'}, 'book_author_id_idx'),
+        ({'title_prefix': 'Book 1'}, 'book_title_idx'),
+        ({'ordering': 'title'}, 'book_title_idx'),
+    ])
+    def test_index_used(self, user, params, index):
+        params = {key: user.id if key == 'author' else value for key, value in params.items()}
+        plan = query_plan(self._list_sql(**params))
+
+        assert index in plan
+        assert 'SCAN app_book\n' not in f'{plan}\n'
+        assert 'Seq Scan' not in plan
@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_UNKNOWN
+
+from backend.postgresql_pool.base import DatabaseWrapper, close_pools
+from backend.postgresql_pool.pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = type('Info', (), {'transaction_status': TRANSACTION_STATUS_IDLE})()
+        self.rolled_back = False
+        self.healthy = True
+
+    def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def execute(self, sql):
+                if not connection.healthy:
+                    raise OperationalError('server closed the connection unexpectedly')
+
+        return Cursor()
+
+
+class TestConnectionPool:
+
+    def test_reuses_connections(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+
+        assert pool.acquire(FakeConnection) is first
+
+    def test_size_limit(self):
+        pool = ConnectionPool(max_size=2, timeout=0.05)
+        pool.acquire(FakeConnection)
+        pool.acquire(FakeConnection)
+
+        with pytest.raises(OperationalError):
+            pool.acquire(FakeConnection)
+
+    def test_waits_for_release(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.acquire(FakeConnection)
+        threading.Timer(0.05, pool.release, args=(connection,)).start()
+
+        assert pool.acquire(FakeConnection) is connection
+
+    def test_rolls_back_open_transaction(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.acquire(FakeConnection)
+        connection.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+
+        assert connection.rolled_back
+        assert pool.idle_count == 1
+
+    def test_discards_broken_connection(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.acquire(FakeConnection)
+        connection.info.transaction_status = TRANSACTION_STATUS_UNKNOWN
+        pool.release(connection)
+
+        assert connection.closed
+        assert pool.idle_count == 0
+        assert pool.acquire(FakeConnection) is not connection
+
+    def test_health_check(self):
+        pool = ConnectionPool(max_size=1, health_checks=True)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        connection.healthy = False
+
+        assert pool.acquire(FakeConnection) is not connection
+        assert connection.closed
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+
+        def connect():
+            raise OperationalError('could not connect to server')
+
+        with pytest.raises(OperationalError):
+            pool.acquire(connect)
+        assert isinstance(pool.acquire(FakeConnection), FakeConnection)
+
+    def test_closed_pool_disconnects_released(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.acquire(FakeConnection)
+        pool.close()
+        pool.release(connection)
+
+        assert connection.closed
+        assert pool.idle_count == 0
+
+
+class TestPooledDatabaseWrapper:
+
+    @pytest.fixture
+    def wrapper(self):
+        yield DatabaseWrapper({'NAME': 'app', 'OPTIONS': {}, 'POOL_MAX_SIZE': 2}, alias='pooled')
+        close_pools()
+
+    def test_pool_per_database(self, wrapper):
+        pool = wrapper.get_pool({'database': 'app', 'host': 'db'})
+
+        assert wrapper.get_pool({'database': 'app', 'host': 'db'}) is pool
+        assert wrapper.get_pool({'database': 'test_app', 'host': 'db'}) is not pool
+
+    def test_close_pools(self, wrapper):
+        pool = wrapper.get_pool({'database': 'app'})
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        close_pools()
+
+        assert connection.closed
+        assert wrapper.get_pool({'database': 'app'}) is not pool
@@ -0,0 +1,161 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings as django_settings
+from django.db import connections
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.models import Book
+from app.routers import ReplicaRouter, replica_reads, tracked_writes
+
+
+client = APIClient()
+
+configured_replicas = [alias for alias in django_settings.DATABASES if alias != 'default']
+
+
+class TestReplicaRouter:
+    router = ReplicaRouter()
+
+    def test_reads(self, settings):
+        settings.DATABASE_REPLICAS = ['replica1', 'replica2']
+
+        assert self.router.db_for_read(Book) is None
+        with replica_reads():
+            assert self.router.db_for_read(Book) in settings.DATABASE_REPLICAS
+        with replica_reads(False):
+            assert self.router.db_for_read(Book) is None
+        assert self.router.db_for_read(Book) is None
+
+    def test_no_replicas(self):
+        with replica_reads():
+            assert self.router.db_for_read(Book) is None
+
+    def test_writes(self, settings):
+        settings.DATABASE_REPLICAS = ['replica1']
+
+        with replica_reads(), tracked_writes() as writes:
+            assert self.router.db_for_write(Book) == 'default'
+        assert writes == [Book]
+
+    def test_migrations(self, settings):
+        settings.DATABASE_REPLICAS = ['replica1']
+
+        assert self.router.allow_migrate('replica1', 'app') is False
+        assert self.router.allow_migrate('default', 'app') is None
+
+
+class TestReplicaRouting:
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def replica_reads(self, settings):
+        # the reads run on the primary, the test database has no replica
+        settings.DATABASE_REPLICAS = ['replica1']
+        with patch('app.routers.random.choice', return_value='default') as choice:
+            yield choice
+
+    @pytest.fixture
+    def user(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    def _reads_replica(self, replica_reads, url):
+        replica_reads.reset_mock()
+        assert client.get(url).status_code == 200
+        return replica_reads.called
+
+    @pytest.mark.django_db
+    def test_read_your_writes(self, user, replica_reads):
+        assert self._reads_replica(replica_reads, self.books_url)
+        assert self._reads_replica(replica_reads, '/api/v1/users/own/')
+
+        replica_reads.reset_mock()
+        response = client.post(f'{self.books_url}create_book/', {'title': 'New', 'author': user.id}, format='json')
+        assert response.status_code == 201
+        assert not replica_reads.called
+
+        assert not self._reads_replica(replica_reads, self.books_url)
+        assert not self._reads_replica(replica_reads, f'{self.books_url}{Book.objects.get().id}/')
+
+    @pytest.mark.django_db
+    def test_sticky_window(self, user, replica_reads, settings):
+        settings.REPLICA_STICKY_SECONDS = 0
+        client.post(f'{self.books_url}create_book/', {'title': 'New', 'author': user.id}, format='json')
+
+        assert self._reads_replica(replica_reads, self.books_url)
+
+    @pytest.mark.django_db
+    def test_other_users_read_replicas(self, user, replica_reads, user_factory):
+        client.post(f'{self.books_url}create_book/', {'title': 'New', 'author': user.id}, format='json')
+
+        client.force_authenticate(user_factory(username='other', email='other@authors.com'))
+        assert self._reads_replica(replica_reads, self.books_url)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_views(self, user, replica_reads):
+        assert self._reads_replica(replica_reads, '/api/v1/async/books/')
+
+        client.post('/api/v1/async/books/', {'title': 'New', 'author': user.id}, format='json')
+        assert not self._reads_replica(replica_reads, '/api/v1/async/books/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_handler(self, user, replica_reads, caplog, settings):
+        # Django logs the middleware it adapts to the mode of the handler in debug mode only
+        settings.DEBUG = True
+        async_client = AsyncClient()
+        async_client.force_login(user)
+
+        async def create_book():
+            return await async_client.post(
+                '/api/v1/async/books/', {'title': 'New', 'author': user.id}, content_type='application/json',
+            )
+
+        with caplog.at_level(logging.DEBUG, logger='django.request'):
+            response = async_to_sync(create_book)()
+
+        assert response.status_code == 201
+        assert 'ReplicaStickinessMiddleware' not in caplog.text
+        assert not self._reads_replica(replica_reads, '/api/v1/async/books/')
+
+
+@pytest.mark.skipif(not configured_replicas, reason='Set DB_REPLICAS to test with replica databases')
+class TestReplicaDatabases:
+    """
+    Runs with the replicas from DB_REPLICAS, e.g. a second SQLite file. The test
+    databases of the replicas mirror the primary one
+    """
+
+    email = 'alex@authors.com'
+    books_url = '/api/v1/books/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.mark.django_db(transaction=True, databases='__all__')
+    def test_reads_go_to_replicas(self, settings, user_factory, book_factory):
+        settings.DATABASE_REPLICAS = configured_replicas[:1]
+        user = user_factory(email=self.email)
+        book_factory(title='Replicated', author=user)
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[configured_replicas[0]]) as replica:
+                response = client.get(self.books_url)
+
+        assert [book['title'] for book in response.json()['results']] == ['Replicated']
+        assert len(replica) == 1
+        assert not any('app_book' in query['sql'] for query in primary)
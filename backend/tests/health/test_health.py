@@ -0,0 +1,118 @@
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from app.health import CircuitBreaker, UpstreamHealth, upstream_health
+
+
+class TestUpstreamHealth:
+
+    def test_available(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url)
+
+        assert health.refresh() is True
+        assert health.is_available() is True
+
+    @pytest.mark.parametrize('status_code', [400, 404, 500])
+    def test_not_available(self, upstream_server, status_code):
+        upstream_server.status = status_code
+        health = UpstreamHealth(upstream_server.url)
+
+        assert health.refresh() is False
+        assert health.is_available() is False
+
+    def test_timeout(self, upstream_server):
+        upstream_server.delay = 0.5
+        health = UpstreamHealth(upstream_server.url, timeout=0.1)
+
+        assert health.refresh() is False
+
+    def test_cached_status(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url, ttl=60)
+        health.refresh()
+        for _ in range(10):
+            assert health.is_available() is True
+
+        assert upstream_server.hits == 1
+
+    def test_background_refresh(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url, fail_open=False)
+
+        assert health.is_available() is False
+        health._refresh_thread.join(timeout=5)
+        assert health.is_available() is True
+        assert upstream_server.hits == 1
+
+    def test_circuit_opens(self, upstream_server):
+        upstream_server.status = 500
+        health = UpstreamHealth(upstream_server.url, failure_threshold=2, reset_timeout=60)
+        for _ in range(5):
+            health.refresh()
+
+        assert health.breaker.state == CircuitBreaker.OPEN
+        assert upstream_server.hits == 2
+
+    def test_backend_from_settings(self, settings, upstream_server):
+        settings.UPSTREAM_HEALTH = {
+            'BACKEND': 'app.health.UpstreamHealth',
+            'OPTIONS': {'url': upstream_server.url, 'timeout': 1},
+        }
+
+        assert isinstance(upstream_health(), UpstreamHealth)
+        assert upstream_health().url == upstream_server.url
+
+
+class TestCircuitBreaker:
+
+    def test_half_open_after_timeout(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+
+        assert not breaker.allow_request()
+        now[0] = 10.0
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        now[0] = 20.0
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestAsyncUpstreamHealth:
+
+    def test_available(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url)
+
+        assert async_to_sync(health.arefresh)() is True
+        assert health.is_available() is True
+
+    def test_not_available(self, upstream_server):
+        upstream_server.status = 500
+        health = UpstreamHealth(upstream_server.url)
+
+        assert async_to_sync(health.arefresh)() is False
+
+    def test_timeout(self, upstream_server):
+        upstream_server.delay = 0.5
+        health = UpstreamHealth(upstream_server.url, timeout=0.1)
+
+        assert async_to_sync(health.arefresh)() is False
+
+    def test_client_of_previous_loop_closed(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url)
+        async_to_sync(health.arefresh)()
+        client = health._async_client
+        async_to_sync(health.arefresh)()
+
+        assert client.is_closed
+        assert health._async_client is not client
+        assert upstream_server.hits == 2
+
+    def test_cached_status(self, upstream_server):
+        health = UpstreamHealth(upstream_server.url, ttl=60)
+        health.refresh()
+
+        assert async_to_sync(health.ais_available)() is True
+        assert upstream_server.hits == 1
@@ -0,0 +1,267 @@
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.jobs import JOBS, enqueue, job, prune_jobs, work
+from app.models import Book, Job
+
+
+client = APIClient()
+
+
+class MemoryQueue:
+    """
+    Stands in for the Redis lists
+    """
+
+    def __init__(self):
+        self.items = deque()
+        self.processing = defaultdict(deque)
+        self.delayed = {}
+        self.alive = set()
+
+    def push(self, job_id):
+        self.items.appendleft(str(job_id))
+
+    def push_later(self, job_id, delay):
+        self.delayed[str(job_id)] = time.time() + delay
+
+    def promote(self):
+        for job_id, due in list(self.delayed.items()):
+            if due <= time.time():
+                del self.delayed[job_id]
+                self.push(job_id)
+
+    def pop(self, timeout, worker):
+        if not self.items:
+            return None
+        job_id = self.items.pop()
+        self.processing[worker].appendleft(job_id)
+        return job_id
+
+    def ack(self, job_id, worker):
+        self.processing[worker].remove(str(job_id))
+
+    def beat(self, worker, ttl):
+        self.alive.add(worker)
+
+    def stop(self, worker):
+        self.alive.discard(worker)
+
+    def dead_workers(self):
+        return [worker for worker in self.processing if worker not in self.alive]
+
+    def taken(self, worker):
+        return list(self.processing[worker])
+
+    def release(self, worker):
+        while self.processing[worker]:
+            self.push(self.processing[worker].pop())
+
+
+@pytest.fixture
+def queue(settings):
+    settings.JOBS_EAGER = False
+    queue = MemoryQueue()
+    # the worker would close the connection of the test transaction, which Postgres does not keep
+    with patch('app.jobs.job_queue', return_value=queue), patch('app.jobs.close_old_connections'):
+        yield queue
+
+
+@pytest.fixture
+def failing_job():
+    calls = []
+
+    @job
+    def fail(value):
+        calls.append(value)
+        raise ValueError('broken')
+
+    yield calls
+    del JOBS['fail']
+
+
+class TestBookJobs:
+    email = 'alex@authors.com'
+    create_book_url = '/api/v1/books/create_book/'
+
+    @pytest.fixture(autouse=True)
+    def logout(self):
+        yield
+        client.logout()
+
+    @pytest.fixture
+    def user(self, user_factory):
+        user = user_factory(email=self.email)
+        client.force_authenticate(user)
+        return user
+
+    @pytest.mark.django_db
+    def test_eager(self, user, mailoutbox):
+        response = client.post(self.create_book_url, {'title': 'Eager', 'author': user.id}, format='json')
+
+        assert response.status_code == 201
+        job_response = client.get(f'/api/v1/jobs/{response.json()["job"]}/')
+        assert job_response.json()['name'] == 'process_new_book'
+        assert job_response.json()['status'] == Job.DONE
+        assert [mail.to for mail in mailoutbox] == [[self.email]]
+
+    @pytest.mark.django_db
+    def test_queued_off_request_path(self, user, queue, mailoutbox, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(self.create_book_url, {'title': 'Queued', 'author': user.id}, format='json')
+        job_id = response.json()['job']
+
+        assert list(queue.items) == [job_id]
+        assert client.get(f'/api/v1/jobs/{job_id}/').json()['status'] == Job.QUEUED
+        assert mailoutbox == []
+
+        work(once=True)
+        assert client.get(f'/api/v1/jobs/{job_id}/').json()['status'] == Job.DONE
+        assert len(mailoutbox) == 1
+        assert 'Queued' in mailoutbox[0].subject
+
+    @pytest.mark.django_db
+    def test_job_visibility(self, user, user_factory):
+        job_id = Book.objects.create(title='Mine', author=user).job.id
+        assert client.get(f'/api/v1/jobs/{job_id}/').status_code == 200
+
+        client.force_authenticate(user_factory(username='other', email='other@authors.com'))
+        assert client.get(f'/api/v1/jobs/{job_id}/').status_code == 404
+
+        client.force_authenticate(user_factory(username='admin', email='admin@authors.com', is_staff=True))
+        assert client.get(f'/api/v1/jobs/{job_id}/').status_code == 200
+
+
+class TestWorker:
+
+    @pytest.mark.django_db
+    def test_retries_until_failed(self, settings, queue, failing_job):
+        settings.JOBS_MAX_ATTEMPTS = 2
+        settings.JOBS_RETRY_DELAY = 0
+        instance = JOBS['fail'].enqueue(1)
+        queue.push(instance.id)
+
+        work(once=True)
+        instance.refresh_from_db()
+        assert failing_job == [1, 1]
+        assert instance.status == Job.FAILED
+        assert instance.attempts == 2
+        assert 'broken' in instance.error
+        assert instance.finished_at is not None
+
+    @pytest.mark.django_db
+    def test_retry_backoff(self, settings, queue, failing_job):
+        settings.JOBS_MAX_ATTEMPTS = 3
+        settings.JOBS_RETRY_DELAY = 10
+        instance = JOBS['fail'].enqueue(1)
+        queue.push(instance.id)
+
+        work(once=True)
+        assert failing_job == [1]
+        assert Job.objects.get(id=instance.id).status == Job.QUEUED
+        assert 9 < queue.delayed[str(instance.id)] - time.time() <= 10
+
+        queue.delayed[str(instance.id)] = 0
+        work(once=True)
+        assert failing_job == [1, 1]
+        assert 19 < queue.delayed[str(instance.id)] - time.time() <= 20
+
+    @pytest.mark.django_db
+    def test_acknowledged_after_run(self, queue):
+        instance = JOBS['index_books'].enqueue([])
+        queue.push(instance.id)
+
+        with patch.dict(JOBS, {'index_books': lambda book_ids: taken.extend(queue.processing['worker'])}):
+            taken = []
+            work(once=True, worker='worker')
+        assert taken == [str(instance.id)]
+        assert not queue.processing['worker']
+        assert queue.alive == set()
+
+    @pytest.mark.django_db
+    def test_jobs_of_dead_worker_requeued(self, queue):
+        running = JOBS['index_books'].enqueue([1])
+        Job.objects.filter(id=running.id).update(status=Job.RUNNING, attempts=1)
+        taken = JOBS['index_books'].enqueue([2])
+        queue.processing['dead'].extend([str(running.id), str(taken.id)])
+
+        with patch.dict(JOBS, {'index_books': lambda book_ids: calls.append(book_ids)}):
+            calls = []
+            work(once=True)
+        assert sorted(calls) == [[1], [2]]
+        assert Job.objects.get(id=running.id).status == Job.DONE
+        assert Job.objects.get(id=running.id).attempts == 2
+        assert not queue.processing['dead']
+
+    @pytest.mark.django_db
+    def test_jobs_of_live_worker_kept(self, queue):
+        instance = JOBS['index_books'].enqueue([])
+        Job.objects.filter(id=instance.id).update(status=Job.RUNNING)
+        queue.processing['busy'].append(str(instance.id))
+        queue.beat('busy', 60)
+
+        work(once=True)
+        assert list(queue.processing['busy']) == [str(instance.id)]
+        assert Job.objects.get(id=instance.id).status == Job.RUNNING
+
+    @pytest.mark.django_db
+    def test_job_runs_once(self, queue):
+        instance = JOBS['index_books'].enqueue([])
+        queue.push(instance.id)
+        queue.push(instance.id)
+
+        with patch.dict(JOBS, {'index_books': lambda book_ids: calls.append(book_ids)}):
+            calls = []
+            work(once=True)
+        assert calls == [[]]
+        assert Job.objects.get(id=instance.id).attempts == 1
+
+    @pytest.mark.django_db
+    def test_unknown_job(self):
+        with pytest.raises(KeyError):
+            enqueue('missing')
+
+
+class TestPruneJobs:
+
+    @pytest.fixture
+    def jobs(self, settings):
+        settings.JOBS_RETENTION = 60
+        old = timezone.now() - timedelta(seconds=120)
+        return {
+            key: Job.objects.create(name='process_new_book', status=status, finished_at=finished_at)
+            for key, status, finished_at in [
+                (Job.DONE, Job.DONE, old),
+                (Job.FAILED, Job.FAILED, old),
+                (Job.QUEUED, Job.QUEUED, None),
+                (Job.RUNNING, Job.RUNNING, None),
+                ('recent', Job.DONE, timezone.now()),
+            ]
+        }
+
+    @pytest.mark.django_db
+    def test_prune(self, jobs):
+        assert prune_jobs(batch_size=1) == 2
+        assert set(Job.objects.values_list('id', flat=True)) == {
+            jobs[key].id for key in (Job.QUEUED, Job.RUNNING, 'recent')
+        }
+
+    @pytest.mark.django_db
+    def test_pruned_by_worker(self, jobs, queue):
+        work(once=True)
+
+        assert not Job.objects.filter(id=jobs[Job.DONE].id).exists()
+        assert Job.objects.count() == 3
+
+    @pytest.mark.django_db
+    def test_command(self, jobs, capsys):
+        call_command('prune_jobs')
+
+        assert 'Deleted 2 finished jobs' in capsys.readouterr().out
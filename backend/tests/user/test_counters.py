@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app.counters import books_added
+from app.models import Book, User
+
+
+client = APIClient()
+
+
+def counters(user):
+    user.refresh_from_db()
+    return user.books_count, user.last_book_at
+
+
+class TestBookCounters:
+    email = 'alex@authors.com'
+
+    @pytest.fixture
+    def user(self, user_factory):
+        return user_factory(email=self.email)
+
+    @pytest.fixture
+    def other(self, user_factory):
+        return user_factory(username='other', email='other@authors.com')
+
+    @pytest.mark.django_db
+    def test_create_and_delete(self, user, book_factory):
+        assert counters(user) == (0, None)
+
+        first = book_factory(author=user)
+        second = book_factory(author=user)
+        assert counters(user) == (2, second.created_at)
+
+        second.delete()
+        assert counters(user) == (1, first.created_at)
+
+        first.delete()
+        assert counters(user) == (0, None)
+
+    @pytest.mark.django_db
+    def test_author_change(self, user, other, book_factory):
+        book = book_factory(author=user)
+
+        book.author = other
+        book.save()
+        assert counters(user) == (0, None)
+        assert counters(other) == (1, book.created_at)
+
+        book.title = 'renamed'
+        book.save()
+        assert counters(other) == (1, book.created_at)
+
+    @pytest.mark.django_db
+    def test_bulk_create(self, user, other):
+        client.force_authenticate(user)
+        books = [{'title': f'Bulk {index}', 'author': author.id} for index in range(3) for author in (user, other)]
+        books.append({'title': 'Extra', 'author': user.id})
+
+        assert client.post('/api/v1/books/bulk/', books, format='json').status_code == 201
+        assert counters(user) == (4, Book.objects.filter(author=user).latest('created_at').created_at)
+        assert counters(other)[0] == 3
+        client.logout()
+
+    @pytest.mark.django_db
+    def test_added_without_reading_books(self, user, other, book_factory):
+        latest = book_factory(author=other)
+        added = [
+            Book(author=other, created_at=latest.created_at - timedelta(days=1)),
+            Book(author=user, created_at=latest.created_at - timedelta(days=2)),
+            Book(author=user, created_at=latest.created_at - timedelta(days=3)),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            books_added(added)
+
+        assert len(queries) == 1
+        assert '"app_book"' not in queries[0]['sql']
+        # an older book does not move the latest date back
+        assert counters(other) == (2, latest.created_at)
+        assert counters(user) == (2, latest.created_at - timedelta(days=2))
+
+    @pytest.mark.django_db
+    def test_reconcile(self, user, other, book_factory, capsys):
+        book = book_factory(author=user)
+        User.objects.filter(pk=user.pk).update(books_count=5, last_book_at=None)
+        User.objects.filter(pk=other.pk).update(books_count=1)
+
+        call_command('reconcile_book_counts', '--dry-run')
+        assert '2 users with wrong counters' in capsys.readouterr().out
+        assert counters(user) == (5, None)
+
+        call_command('reconcile_book_counts')
+        assert 'Fixed counters of 2 users' in capsys.readouterr().out
+        assert counters(user) == (1, book.created_at)
+        assert counters(other) == (0, None)
+
+        call_command('reconcile_book_counts')
+        assert '0 users with wrong counters' in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from app.models import User
+
+
+class TestProvisionUsers:
+    email = 'alex@authors.com'
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        path = tmp_path / 'users.csv'
+        path.write_text(
+            'username,email,password,age\n'
+            'reader1,reader1@authors.com,secret-1,25\n'
+            'reader2,reader2@authors.com,secret-2,\n'
+            'reader3,reader3@authors.com,secret-3,40\n'
+        )
+        return str(path)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('workers', ['1', '2'])
+    def test_csv(self, csv_file, workers):
+        call_command('provision_users', csv_file, '--workers', workers)
+
+        assert User.objects.count() == 3
+        user = User.objects.get(username='reader1')
+        assert user.check_password('secret-1')
+        assert user.age == 25
+        assert User.objects.get(username='reader2').age is None
+        assert User.objects.get(username='reader3').check_password('secret-3')
+
+    @pytest.mark.django_db
+    def test_ndjson_skips_existing(self, tmp_path, user_factory, capsys):
+        user_factory(username='reader1', email=self.email)
+        path = tmp_path / 'users.ndjson'
+        path.write_text('\n'.join(json.dumps({'username': f'reader{index}', 'password': 'x'}) for index in range(3)))
+        call_command('provision_users', str(path), '--workers', '1')
+
+        assert User.objects.count() == 3
+        assert 'Created 2 users, skipped 1' in capsys.readouterr().out
+
+    @pytest.mark.django_db
+    def test_invalid_user(self, tmp_path):
+        path = tmp_path / 'users.csv'
+        path.write_text('username,password,age\nreader1,x,5\n')
+
+        with pytest.raises(CommandError) as exc:
+            call_command('provision_users', str(path), '--workers', '1')
+        assert 'age' in str(exc.value)
+        assert not User.objects.exists()
+
+    @pytest.mark.django_db
+    def test_missing_password(self, tmp_path):
+        path = tmp_path / 'users.csv'
+        path.write_text('username,password\nreader1,\n')
+
+        with pytest.raises(CommandError):
+            call_command('provision_users', str(path), '--workers', '1')